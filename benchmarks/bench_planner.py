@@ -0,0 +1,166 @@
+"""
+Offline benchmark for the lesson planners in modules/methods_manipulation.py.
+
+Runs every registered planner on synthetic catalogs (100 to 100k methods)
+with several block allocations and reports latency percentiles, how much
+of the lesson time the plans fill, and peak memory allocated per call.
+Needs neither Streamlit nor Supabase.
+
+    python -m benchmarks.bench_planner                      # default sizes
+    python -m benchmarks.bench_planner --sizes 100 1000 --repeat 50
+    python -m benchmarks.bench_planner --save baseline.json
+    python -m benchmarks.bench_planner --compare baseline.json
+
+With --compare the exit code is 1 when a planner got slower than the
+baseline (beyond --tolerance) or fills less of the lesson.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.methods_manipulation import (  # noqa: E402
+    generate_lesson_plans,
+    optimize_lesson,
+    select_suitable_methods,
+)
+
+SIZES = [100, 1_000, 10_000, 100_000]
+LESSON_MINUTES = [45, 90]
+ALLOCATIONS = {
+    "eur": {1: 20, 2: 60, 3: 20},
+    "balanced": {1: 30, 2: 40, 3: 30},
+    "main-heavy": {1: 10, 2: 80, 3: 10},
+    "four-blocks": {1: 15, 2: 35, 3: 35, 4: 15},
+}
+
+# name -> planner(methods, minutes, allocations, seed) -> list of planner rows
+PLANNERS = {
+    "select_suitable_methods": lambda ms, minutes, alloc, seed: select_suitable_methods(
+        ms, minutes, alloc, seed=seed
+    ),
+    "optimize_lesson": lambda ms, minutes, alloc, seed: optimize_lesson(ms, minutes, alloc),
+    "generate_lesson_plans[0]": lambda ms, minutes, alloc, seed: (
+        generate_lesson_plans(ms, minutes, alloc, n_plans=3, seed=seed) or [{"methods": []}]
+    )[0]["methods"],
+}
+
+AGE_LABELS = [("MŠ",), ("1. stupeň ZŠ",), ("2. stupeň ZŠ",), ("SŠ",), ("ZŠ", "SŠ"), ()]
+
+
+def synthetic_catalog(n, seed=0):
+    """Planner rows shaped like catalog_planner_rows output."""
+    rng = random.Random(seed)
+    return [
+        (
+            f"m{i}", f"Method {i}", "",
+            rng.choice([5, 5, 10, 10, 15, 20, 25, 30, 40, 45]) + rng.choice([0, 0, 0, 2, 3]),
+            rng.choice(AGE_LABELS),
+            rng.choice([1, 2, 2, 3, 4]),
+            None, None, (), None,
+        )
+        for i in range(n)
+    ]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def run_case(planner, methods, minutes, allocations, repeat):
+    latencies, utilization = [], []
+    for seed in range(repeat):
+        start = time.perf_counter()
+        plan = planner(methods, minutes, allocations, seed)
+        latencies.append((time.perf_counter() - start) * 1000)
+        utilization.append(sum(row[3] for row in plan) / minutes)
+
+    # memory is measured on separate calls; tracing slows everything down
+    peaks = []
+    for seed in range(min(repeat, 3)):
+        tracemalloc.start()
+        planner(methods, minutes, allocations, seed)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p90_ms": round(percentile(latencies, 90), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "utilization": round(statistics.mean(utilization), 4),
+        "peak_kib": round(max(peaks), 1),
+    }
+
+
+def run(sizes, planners, repeat):
+    results = {}
+    for n in sizes:
+        catalog = synthetic_catalog(n)
+        # big catalogs get fewer repeats so a full run stays in minutes
+        reps = max(3, repeat if n <= 10_000 else repeat // 5)
+        for name in planners:
+            for alloc_name, allocations in ALLOCATIONS.items():
+                for minutes in LESSON_MINUTES:
+                    key = f"{name}|n={n}|{alloc_name}|{minutes}min"
+                    results[key] = run_case(PLANNERS[name], catalog, minutes, allocations, reps)
+                    print(f"{key:<60} {results[key]}", flush=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing regressions against `baseline` (empty if none)."""
+    regressions = []
+    for key, now in results.items():
+        before = baseline.get(key)
+        if not before:
+            continue
+        if now["p50_ms"] > before["p50_ms"] * (1 + tolerance) and now["p50_ms"] - before["p50_ms"] > 0.05:
+            regressions.append(f"{key}: p50 {before['p50_ms']} -> {now['p50_ms']} ms")
+        if now["utilization"] < before["utilization"] - 0.005:
+            regressions.append(f"{key}: utilization {before['utilization']} -> {now['utilization']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--planners", nargs="+", choices=sorted(PLANNERS), default=list(PLANNERS))
+    parser.add_argument("--repeat", type=int, default=30, help="calls per case")
+    parser.add_argument("--save", type=Path, help="write results as a baseline")
+    parser.add_argument("--compare", type=Path, help="baseline to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.planners, args.repeat)
+
+    if args.save:
+        args.save.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, indent=2))
+        print(f"Baseline saved to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
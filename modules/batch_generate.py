@@ -0,0 +1,231 @@
+"""
+Headless batch generation of AI lessons (e.g. overnight lesson packs).
+
+Reads (topic, method ids, lang) rows from CSV or JSONL, builds the same
+prompt as the page (modules/lesson_prompt.py) and appends one JSON line
+per lesson to the output:
+
+    python -m modules.batch_generate topics.csv -o pack.jsonl --concurrency 8
+
+CSV needs a `topic` column, `method_ids` separated by `;` or `,` and an
+optional `lang` (default en); JSONL rows use the same keys, with
+`method_ids` as a list. The output file doubles as the checkpoint: a re-run
+skips rows already written, so an interrupted run resumes where it
+stopped. Answers go through the shared response cache, so lessons the app
+(or an earlier run) already generated cost nothing.
+
+Supabase and OpenAI credentials come from SUPABASE_URL / SUPABASE_KEY /
+OPENAI_API_KEY or .streamlit/secrets.toml. `--catalog rows.json` reads
+methods from a JSON dump instead, and `--backend fake` needs no API key.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+import tomllib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from modules.lesson_prompt import AI_MODEL, PROMPT_VERSION, build_prompt
+from modules.llm_client import get_backend
+from modules.method_catalog import fetch_method_detail, load_snapshot
+from modules.response_cache import ResponseCache, response_key
+
+log = logging.getLogger(__name__)
+
+CONCURRENCY = 8
+SECRETS = Path(".streamlit/secrets.toml")
+
+
+def read_rows(path):
+    """Input rows as dicts with topic, method_ids (list of str) and lang."""
+    path = Path(path)
+    with path.open(encoding="utf-8", newline="") as f:
+        if path.suffix == ".jsonl":
+            raw = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw = list(csv.DictReader(f))
+
+    rows = []
+    for r in raw:
+        ids = r.get("method_ids") or []
+        if isinstance(ids, str):
+            ids = ids.replace(";", ",").split(",")
+        rows.append({
+            "topic": (r.get("topic") or "").strip(),
+            "method_ids": [str(i).strip() for i in ids if str(i).strip()],
+            "lang": (r.get("lang") or "en").strip(),
+        })
+    return [r for r in rows if r["topic"] and r["method_ids"]]
+
+
+def done_keys(path):
+    """Keys already written to the output (failed rows are retried)."""
+    keys = set()
+    if not Path(path).exists():
+        return keys
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut off by an interrupted run
+            if "text" in record:
+                keys.add(record["key"])
+    return keys
+
+
+def _secrets():
+    if SECRETS.exists():
+        with SECRETS.open("rb") as f:
+            return tomllib.load(f)
+    return {}
+
+
+def connect(catalog=None):
+    """Supabase client, or an in-memory one over a JSON dump of `methods` rows."""
+    if catalog:
+        from modules.local_postgrest import LocalPostgrest
+        rows = json.loads(Path(catalog).read_text(encoding="utf-8"))
+        return LocalPostgrest({"methods": rows, "method_visibility": []})
+
+    from supabase import create_client
+    secrets = _secrets().get("supabase", {})
+    return create_client(
+        os.getenv("SUPABASE_URL") or secrets["url"],
+        os.getenv("SUPABASE_KEY") or secrets["key"],
+    )
+
+
+class Generator:
+    def __init__(self, client, backend, cache, model=AI_MODEL):
+        self.client = client
+        self.backend = backend
+        self.cache = cache
+        self.model = model
+        self.snapshot = load_snapshot(client)
+        # CSV ids are text; catalog ids may be ints
+        self._ids = {str(m_id): m_id for m_id, _ in self.snapshot.methods}
+        self._load = lambda m_id, code: fetch_method_detail(client, m_id, code)
+
+    def key(self, row):
+        return response_key(row["method_ids"], row["topic"], row["lang"], PROMPT_VERSION, self.model)
+
+    def methods(self, row):
+        """The row's methods with their steps loaded (once per method and language)."""
+        missing = [i for i in row["method_ids"] if i not in self._ids]
+        if missing:
+            raise KeyError(f"unknown method ids: {', '.join(missing)}")
+        by_id = self.snapshot.by_id(row["lang"])
+        return [self.snapshot.detail(by_id[self._ids[i]], self._load) for i in row["method_ids"]]
+
+    def prompt(self, row):
+        methods = self.methods(row)
+        return build_prompt(
+            row["topic"],
+            [self.snapshot.prompt_fragment(m, self._load) for m in methods],
+            row["lang"],
+            [len(m.steps or ()) for m in methods],
+            model=self.model,
+        )
+
+    def generate(self, row):
+        key = self.key(row)
+        record = {
+            "key": key,
+            "topic": row["topic"],
+            "method_ids": row["method_ids"],
+            "lang": row["lang"],
+            "prompt_version": PROMPT_VERSION,
+            "model": self.model,
+        }
+        try:
+            text = self.cache.get(key)
+            record["cached"] = text is not None
+            if text is None:
+                prompt = self.prompt(row)
+                record["input_tokens"] = prompt.input_tokens
+                record["max_tokens"] = prompt.max_tokens
+                record["est_cost"] = prompt.cost
+                text = self.backend.complete(
+                    [{"role": "user", "content": prompt.prompt}], model=self.model, max_tokens=prompt.max_tokens
+                )
+                self.cache.put(key, text, row["topic"], row["lang"], PROMPT_VERSION)
+            record["text"] = text
+        except Exception as e:
+            log.warning("Row %r failed: %s", row["topic"], e)
+            record["error"] = str(e)
+        return record
+
+
+def run(rows, generator, output, concurrency=CONCURRENCY):
+    """Generate the rows not yet in `output`, appending as they finish. Returns (written, failed)."""
+    finished = done_keys(output)
+    todo, seen = [], set(finished)
+    for row in rows:
+        key = generator.key(row)
+        if key not in seen:
+            seen.add(key)
+            todo.append(row)
+    print(f"{len(rows)} rows, {len(rows) - len(todo)} already done, {len(todo)} to generate", file=sys.stderr)
+
+    written = failed = 0
+    cost = 0.0
+    started = time.time()
+    with open(output, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        queue = iter(todo)
+        running = set()
+        while True:
+            # keep at most 2x concurrency rows in flight
+            for row in queue:
+                running.add(pool.submit(generator.generate, row))
+                if len(running) >= 2 * concurrency:
+                    break
+            if not running:
+                break
+            completed, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in completed:
+                record = future.result()
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                written += 1
+                failed += "error" in record
+                cost += record.get("est_cost") or 0
+            print(f"\r{written}/{len(todo)} ({failed} failed, {time.time() - started:.0f}s)", end="", file=sys.stderr)
+    print(f"\nestimated cost at most ${cost:.4f}", file=sys.stderr)
+    return written, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate AI lessons for many topics without the app.")
+    parser.add_argument("input", help="CSV or JSONL with topic, method_ids, lang")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to append to (and resume from)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--cache", default=os.getenv("AI_CACHE_PATH", ".cache/ai_responses.sqlite"))
+    parser.add_argument("--catalog", help="JSON dump of `methods` rows instead of Supabase")
+    parser.add_argument("--backend", choices=["openai", "fake"], default=os.getenv("LLM_BACKEND", "openai"))
+    parser.add_argument("--model", default=AI_MODEL)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    api_key = None
+    if args.backend == "openai":
+        api_key = os.getenv("OPENAI_API_KEY") or _secrets().get("open_AI", {}).get("OPENAI_API_KEY")
+        if not api_key:
+            parser.error("no OpenAI API key (OPENAI_API_KEY or .streamlit/secrets.toml)")
+
+    generator = Generator(
+        connect(args.catalog),
+        get_backend(api_key, kind=args.backend),
+        ResponseCache(args.cache),
+        model=args.model,
+    )
+    _, failed = run(read_rows(args.input), generator, args.output, args.concurrency)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -124,6 +124,11 @@ def can_generate_lesson(profile, plan):
     return True, ""
 
 
+GUEST_DAY_LIMIT = 3
+GUEST_WEEK_LIMIT = 6
+GUEST_MONTH_LIMIT = 9
+
+
 def can_generate_guest(guest):
     today = date.today()
     week_start = today - timedelta(days=today.weekday())
@@ -139,9 +144,9 @@ def can_generate_guest(guest):
         guest["ai_used_month"] = 0
         guest["month_start"] = month_start
 
-    DAY_LIMIT = 3
-    WEEK_LIMIT = 6
-    MONTH_LIMIT = 9
+    DAY_LIMIT = GUEST_DAY_LIMIT
+    WEEK_LIMIT = GUEST_WEEK_LIMIT
+    MONTH_LIMIT = GUEST_MONTH_LIMIT
 
  #   if guest["lessons_generated"] >= DAY_LIMIT:
  #       return False, True
@@ -154,6 +159,31 @@ def can_generate_guest(guest):
 
     return True, None
 
+
+def remaining_lessons(profile, plan):
+    """How many more lessons the plan allows right now (None = unlimited)."""
+    profile = reset_quotas_if_needed(profile)
+    left = [
+        plan[quota] - (profile.get(used) or 0)
+        for used, quota in (
+            ("lessons_used_daily", "lesson_daily"),
+            ("lessons_used_weekly", "lesson_weekly"),
+            ("lessons_used_monthly", "lesson_monthly"),
+            ("lessons_used_total", "lesson_total"),
+        )
+        if plan.get(quota) is not None
+    ]
+    return max(min(left), 0) if left else None
+
+
+def remaining_guest(guest):
+    """How many more lessons a guest may generate (call after can_generate_guest)."""
+    return max(min(
+        GUEST_DAY_LIMIT - (guest.get("lessons_generated") or 0),
+        GUEST_WEEK_LIMIT - (guest.get("ai_used_week") or 0),
+        GUEST_MONTH_LIMIT - (guest.get("ai_used_month") or 0),
+    ), 0)
+
 def record_generation(profile: dict) -> dict:
     """
     Increment AI generation counters on a user profile.
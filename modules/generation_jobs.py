@@ -0,0 +1,260 @@
+"""
+Background AI generation jobs.
+
+A completion runs on a small worker pool instead of the Streamlit script
+thread, so widget interaction, reruns and page switches never wait for or
+lose an in-flight generation. Jobs are stored by id and remembered per
+owner (user id or anon id); the page polls its job and shows the partial
+text streamed so far.
+
+A batch (one method set adapted to many topics) runs its items on the same
+worker pool, keeping at most `concurrency` of them in it at a time, so the
+pool size stays the cap on upstream calls and a batch never crowds out
+single generations.
+
+Jobs submitted with a key (the response cache key) are single-flight: while
+one is running, identical requests from other owners join it instead of
+making their own upstream call. Whether joiners are charged quota is the
+`charge` policy.
+"""
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+BATCH_CONCURRENCY = 20  # pool workers one batch may hold at once (a whole page batch)
+WORKERS = BATCH_CONCURRENCY + 4  # concurrent upstream calls per process; room for single generations
+MAX_PENDING = 32     # queued + running jobs before new ones are refused
+KEEP_FOR = 3600      # seconds a finished job stays retrievable
+
+# Who pays for a coalesced generation
+CHARGE_EACH = "each"    # every requester, as if each had made the call
+CHARGE_FIRST = "first"  # only the requester who started it
+
+_ACTIVE = ("queued", "running")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobRunning(Exception):
+    """The owner already has a different generation running (`job`)."""
+
+    def __init__(self, job):
+        super().__init__(f"job {job.id} is still running")
+        self.job = job
+
+
+class GenerationJob:
+    """One generation; `text` grows while the worker streams."""
+
+    def __init__(self, job_id, owner, meta, key=None, charge=CHARGE_EACH):
+        self.id = job_id
+        self.owners = [owner]   # first one started it, the rest joined
+        self.key = key
+        self.meta = meta
+        self.charge = charge
+        self.status = "queued"
+        self.text = ""
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._claimed = set()
+        self._lock = threading.Lock()
+
+    @property
+    def owner(self):
+        return self.owners[0]
+
+    @property
+    def active(self):
+        return self.status in _ACTIVE
+
+    def claimed_by(self, owner):
+        return owner in self._claimed
+
+    def append(self, delta):
+        with self._lock:
+            self.text += delta
+
+    def claim(self, owner):
+        """True exactly once per owner of a finished job: the caller shows it (and maybe charges)."""
+        with self._lock:
+            if self.status != "done" or owner not in self.owners or owner in self._claimed:
+                return False
+            self._claimed.add(owner)
+            return True
+
+    def charges(self, owner):
+        """Whether `owner` pays quota for this job under its charge policy."""
+        return self.charge == CHARGE_EACH or owner == self.owner
+
+
+class GenerationBatch:
+    """Jobs started together; each item is claimed (and charged) on its own."""
+
+    def __init__(self, batch_id, owner, jobs):
+        self.id = batch_id
+        self.owner = owner
+        self.jobs = jobs
+
+    @property
+    def active(self):
+        return any(job.active for job in self.jobs)
+
+    @property
+    def finished(self):
+        return sum(not job.active for job in self.jobs)
+
+
+class GenerationJobs:
+    def __init__(self, workers=WORKERS, max_pending=MAX_PENDING, keep_for=KEEP_FOR,
+                 charge=CHARGE_EACH):
+        if charge not in (CHARGE_EACH, CHARGE_FIRST):
+            raise ValueError(f"Unknown charge policy: {charge}")
+        self.max_pending = max_pending
+        self.keep_for = keep_for
+        self.charge = charge
+        self.coalesced = 0  # requests that joined a running job
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generation")
+        self._jobs = {}
+        self._latest = {}    # owner -> newest job id
+        self._inflight = {}  # key -> running job
+        self._batches = {}
+        self._latest_batch = {}  # owner -> newest batch id
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, owner, work, key=None, **meta):
+        """
+        Queue `work(job)` for `owner` and return the job. `work` streams its
+        output through job.append(). Resubmitting the owner's running job
+        (same `key`) returns it; a different request raises JobRunning
+        until it finishes. A running job with the same `key` is joined.
+        """
+        with self._lock:
+            self._prune()
+            current = self._jobs.get(self._latest.get(owner))
+            if current is not None and current.active:
+                if key is not None and current.key == key:
+                    return current
+                raise JobRunning(current)
+
+            shared = self._inflight.get(key) if key is not None else None
+            if shared is not None and shared.active:
+                shared.owners.append(owner)
+                self._latest[owner] = shared.id
+                self.coalesced += 1
+                return shared
+
+            if sum(job.active for job in self._jobs.values()) >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} generations already pending")
+
+            job = GenerationJob(f"{next(self._ids)}-{time.time_ns():x}", owner, meta, key, self.charge)
+            self._jobs[job.id] = job
+            self._latest[owner] = job.id
+            if key is not None:
+                self._inflight[key] = job
+        self._pool.submit(self._run, job, work)
+        return job
+
+    def submit_batch(self, owner, items, concurrency=BATCH_CONCURRENCY):
+        """
+        Start one job per `(work, key, meta)` item and return the batch. Items
+        whose key is already running join that job. An owner's unfinished
+        batch is returned instead of starting another.
+        """
+        with self._lock:
+            self._prune()
+            current = self._batches.get(self._latest_batch.get(owner))
+            if current is not None and current.active:
+                return current
+
+            pending = sum(job.active for job in self._jobs.values())
+            if pending + len(items) > self.max_pending:
+                raise QueueFull(f"{pending} generations already pending")
+
+            jobs, new = [], []
+            for work, key, meta in items:
+                shared = self._inflight.get(key) if key is not None else None
+                if shared is not None and shared.active:
+                    if owner not in shared.owners:
+                        shared.owners.append(owner)
+                    self.coalesced += 1
+                    jobs.append(shared)
+                    continue
+                job = GenerationJob(f"{next(self._ids)}-{time.time_ns():x}", owner, meta, key, self.charge)
+                self._jobs[job.id] = job
+                if key is not None:
+                    self._inflight[key] = job
+                jobs.append(job)
+                new.append((job, work))
+
+            batch = GenerationBatch(f"b{next(self._ids)}-{time.time_ns():x}", owner, jobs)
+            self._batches[batch.id] = batch
+            self._latest_batch[owner] = batch.id
+
+        if new:
+            self._feed_batch(new, concurrency)
+        return batch
+
+    def _feed_batch(self, new, concurrency):
+        """Submit batch items to the shared pool, the next one as each finishes."""
+        queue = iter(new)
+        lock = threading.Lock()
+
+        def submit_next(_=None):
+            with lock:
+                item = next(queue, None)
+            if item is not None:
+                self._pool.submit(self._run, *item).add_done_callback(submit_next)
+
+        for _ in range(max(1, concurrency)):
+            submit_next()
+
+    def _run(self, job, work):
+        job.status = "running"
+        try:
+            work(job)
+        except Exception as e:
+            log.exception("Generation job %s failed", job.id)
+            job.error = str(e)
+            status = "failed"
+        else:
+            status = "done"
+        with self._lock:
+            job.finished_at = time.time()
+            job.status = status
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def latest(self, owner):
+        """The owner's newest job (e.g. after a page switch), or None."""
+        return self._jobs.get(self._latest.get(owner))
+
+    def get_batch(self, batch_id):
+        return self._batches.get(batch_id)
+
+    def latest_batch(self, owner):
+        return self._batches.get(self._latest_batch.get(owner))
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_for
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                for owner in job.owners:
+                    if self._latest.get(owner) == job_id:
+                        del self._latest[owner]
+        for batch_id, batch in list(self._batches.items()):
+            if not any(job.id in self._jobs for job in batch.jobs):
+                del self._batches[batch_id]
+                if self._latest_batch.get(batch.owner) == batch_id:
+                    del self._latest_batch[batch.owner]
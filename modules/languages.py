@@ -193,7 +193,36 @@ Soon you'll be able to build full lessons and combine reusable blocks.
         "selected_max_two": "You’ve selected the maximum of 2 methods.",
         "enter_topic_first": "Enter a topic first.",
         "cannot_generate_now": "You can’t generate right now.",
-        "generating_lesson": "Generating lesson..."
+        "generating_lesson": "Generating lesson...",
+        "fallback_language_note": "Not translated yet – shown in English",
+        "page_of": "Page {page} of {pages}",
+        "methods_per_page": "Methods per page",
+        "search_methods": "Search methods",
+        "no_methods_found": "No methods match your search.",
+        "filters": "Filters",
+        "tags": "Tags",
+        "fits_in_minutes": "Fits in (minutes)",
+        "pupil_age": "Pupil age",
+        "lesson_planner": "Lesson planner",
+        "lesson_minutes": "Lesson length (minutes)",
+        "plan_lesson": "Plan a lesson",
+        "another_plan": "Another plan",
+        "no_plan_possible": "No combination of methods fits this lesson.",
+        "planned_minutes": "{used} of {total} minutes planned",
+        "block_1": "Lead-in",
+        "block_2": "Main activity",
+        "block_3": "Reflection",
+        "generation_busy": "Too many lessons are being generated right now. Please try again in a moment.",
+        "batch_generation": "Many topics at once",
+        "batch_topics": "Topics (one per line)",
+        "generate_batch_button": "Generate for all topics",
+        "batch_progress": "{done} of {total} topics done",
+        "batch_quota_trimmed": "Your quota covers only {n} more lessons; the remaining topics were skipped.",
+        "ai_estimate": "≈ {tokens} prompt tokens, answer up to {max_tokens} tokens, at most ${cost:.4f}",
+        "ai_steps_trimmed": "Long step lists were shortened to keep the request small.",
+        "similar_topic_reused": "Reused the lesson generated for a similar topic: {topic}",
+        "generate_fresh_button": "Generate fresh for this exact topic",
+        "generation_running": "A lesson on \"{topic}\" is still being generated. Wait for it to finish, then try again."
     },
    
     "cs": {
@@ -389,7 +418,36 @@ Brzy budete moci stavět celé lekce a kombinovat předpřipravené bloky.
         "selected_max_two": "Vybral(a) jsi maximální počet 2 metod.",
         "enter_topic_first": "Nejprve zadej téma.",
         "cannot_generate_now": "Teď nemůžeš generovat.",
-        "generating_lesson": "Generuji lekci..."
+        "generating_lesson": "Generuji lekci...",
+        "fallback_language_note": "Zatím nepřeloženo – zobrazeno v angličtině",
+        "page_of": "Strana {page} z {pages}",
+        "methods_per_page": "Metod na stránku",
+        "search_methods": "Hledat metody",
+        "no_methods_found": "Hledání neodpovídá žádná metoda.",
+        "filters": "Filtry",
+        "tags": "Štítky",
+        "fits_in_minutes": "Vejde se do (minut)",
+        "pupil_age": "Věk žáků",
+        "lesson_planner": "Plánovač hodiny",
+        "lesson_minutes": "Délka hodiny (minuty)",
+        "plan_lesson": "Naplánuj hodinu",
+        "another_plan": "Jiný plán",
+        "no_plan_possible": "Do této hodiny se nevejde žádná kombinace metod.",
+        "planned_minutes": "Naplánováno {used} z {total} minut",
+        "block_1": "Evokace",
+        "block_2": "Uvědomění",
+        "block_3": "Reflexe",
+        "generation_busy": "Právě se generuje příliš mnoho lekcí. Zkuste to prosím za chvíli.",
+        "batch_generation": "Více témat najednou",
+        "batch_topics": "Témata (jedno na řádek)",
+        "generate_batch_button": "Vygenerovat pro všechna témata",
+        "batch_progress": "Hotovo {done} z {total} témat",
+        "batch_quota_trimmed": "Váš limit pokryje už jen {n} lekcí; zbývající témata byla vynechána.",
+        "ai_estimate": "≈ {tokens} tokenů zadání, odpověď až {max_tokens} tokenů, nejvýše ${cost:.4f}",
+        "ai_steps_trimmed": "Dlouhé seznamy kroků byly zkráceny, aby byl požadavek menší.",
+        "similar_topic_reused": "Použita lekce vygenerovaná pro podobné téma: {topic}",
+        "generate_fresh_button": "Vygenerovat znovu přesně pro toto téma",
+        "generation_running": "Lekce na téma „{topic}“ se ještě generuje. Počkejte, až se dokončí, a zkuste to znovu."
     },
 "fr": {
     # Billing page
@@ -564,7 +622,36 @@ Création de leçons complètes et blocs combinables.
         "selected_max_two": "Tu as sélectionné le maximum de 2 méthodes.",
         "enter_topic_first": "Saisis d’abord un sujet.",
         "cannot_generate_now": "Tu ne peux pas générer maintenant.",
-        "generating_lesson": "Génération en cours..."
+        "generating_lesson": "Génération en cours...",
+        "fallback_language_note": "Pas encore traduit – affiché en anglais",
+        "page_of": "Page {page} sur {pages}",
+        "methods_per_page": "Méthodes par page",
+        "search_methods": "Rechercher des méthodes",
+        "no_methods_found": "Aucune méthode ne correspond à votre recherche.",
+        "filters": "Filtres",
+        "tags": "Mots-clés",
+        "fits_in_minutes": "Tient en (minutes)",
+        "pupil_age": "Âge des élèves",
+        "lesson_planner": "Planificateur de leçon",
+        "lesson_minutes": "Durée de la leçon (minutes)",
+        "plan_lesson": "Planifier une leçon",
+        "another_plan": "Un autre plan",
+        "no_plan_possible": "Aucune combinaison de méthodes ne convient à cette leçon.",
+        "planned_minutes": "{used} minutes planifiées sur {total}",
+        "block_1": "Mise en route",
+        "block_2": "Activité principale",
+        "block_3": "Réflexion",
+        "generation_busy": "Trop de leçons sont en cours de génération. Réessayez dans un instant.",
+        "batch_generation": "Plusieurs sujets à la fois",
+        "batch_topics": "Sujets (un par ligne)",
+        "generate_batch_button": "Générer pour tous les sujets",
+        "batch_progress": "{done} sujets sur {total} terminés",
+        "batch_quota_trimmed": "Votre quota ne couvre plus que {n} leçons ; les autres sujets ont été ignorés.",
+        "ai_estimate": "≈ {tokens} jetons de prompt, réponse jusqu’à {max_tokens} jetons, au plus {cost:.4f} $",
+        "ai_steps_trimmed": "Les longues listes d’étapes ont été raccourcies pour alléger la requête.",
+        "similar_topic_reused": "Leçon réutilisée d’un sujet similaire : {topic}",
+        "generate_fresh_button": "Générer à nouveau pour ce sujet exact",
+        "generation_running": "Une leçon sur « {topic} » est encore en cours de génération. Attendez qu’elle soit terminée, puis réessayez."
     },
      "es": {
         # Billing page
@@ -749,7 +836,36 @@ Construcción de clases completas y bloques combinables.
         "selected_max_two": "Has seleccionado el máximo de 2 métodos.",
         "enter_topic_first": "Introduce un tema primero.",
         "cannot_generate_now": "No puedes generar ahora.",
-        "generating_lesson": "Generando lección..."
+        "generating_lesson": "Generando lección...",
+        "fallback_language_note": "Aún sin traducir – se muestra en inglés",
+        "page_of": "Página {page} de {pages}",
+        "methods_per_page": "Métodos por página",
+        "search_methods": "Buscar métodos",
+        "no_methods_found": "Ningún método coincide con tu búsqueda.",
+        "filters": "Filtros",
+        "tags": "Etiquetas",
+        "fits_in_minutes": "Cabe en (minutos)",
+        "pupil_age": "Edad de los alumnos",
+        "lesson_planner": "Planificador de clase",
+        "lesson_minutes": "Duración de la clase (minutos)",
+        "plan_lesson": "Planificar una clase",
+        "another_plan": "Otro plan",
+        "no_plan_possible": "Ninguna combinación de métodos encaja en esta clase.",
+        "planned_minutes": "{used} de {total} minutos planificados",
+        "block_1": "Introducción",
+        "block_2": "Actividad principal",
+        "block_3": "Reflexión",
+        "generation_busy": "Se están generando demasiadas lecciones ahora mismo. Inténtalo de nuevo en un momento.",
+        "batch_generation": "Varios temas a la vez",
+        "batch_topics": "Temas (uno por línea)",
+        "generate_batch_button": "Generar para todos los temas",
+        "batch_progress": "{done} de {total} temas listos",
+        "batch_quota_trimmed": "Tu cuota solo cubre {n} lecciones más; se omitieron los demás temas.",
+        "ai_estimate": "≈ {tokens} tokens de entrada, respuesta de hasta {max_tokens} tokens, como máximo ${cost:.4f}",
+        "ai_steps_trimmed": "Las listas de pasos largas se acortaron para que la solicitud sea pequeña.",
+        "similar_topic_reused": "Se reutilizó la lección generada para un tema similar: {topic}",
+        "generate_fresh_button": "Generar de nuevo para este tema exacto",
+        "generation_running": "Todavía se está generando una lección sobre «{topic}». Espera a que termine y vuelve a intentarlo."
     },
     
     "de": {
@@ -929,6 +1045,35 @@ Bald: vollständige Unterrichtseinheiten und kombinierbare Bausteine.
         "selected_max_two": "Du hast das Maximum von 2 Methoden gewählt.",
         "enter_topic_first": "Gib zuerst ein Thema ein.",
         "cannot_generate_now": "Du kannst jetzt nicht generieren.",
-        "generating_lesson": "Lektion wird erzeugt..."
+        "generating_lesson": "Lektion wird erzeugt...",
+        "fallback_language_note": "Noch nicht übersetzt – auf Englisch angezeigt",
+        "page_of": "Seite {page} von {pages}",
+        "methods_per_page": "Methoden pro Seite",
+        "search_methods": "Methoden suchen",
+        "no_methods_found": "Keine Methode passt zu deiner Suche.",
+        "filters": "Filter",
+        "tags": "Schlagwörter",
+        "fits_in_minutes": "Passt in (Minuten)",
+        "pupil_age": "Alter der Schüler",
+        "lesson_planner": "Stundenplaner",
+        "lesson_minutes": "Stundenlänge (Minuten)",
+        "plan_lesson": "Stunde planen",
+        "another_plan": "Anderer Plan",
+        "no_plan_possible": "Keine Methodenkombination passt in diese Stunde.",
+        "planned_minutes": "{used} von {total} Minuten geplant",
+        "block_1": "Einstieg",
+        "block_2": "Hauptteil",
+        "block_3": "Reflexion",
+        "generation_busy": "Gerade werden zu viele Lektionen erzeugt. Bitte versuche es gleich noch einmal.",
+        "batch_generation": "Mehrere Themen auf einmal",
+        "batch_topics": "Themen (eines pro Zeile)",
+        "generate_batch_button": "Für alle Themen erzeugen",
+        "batch_progress": "{done} von {total} Themen fertig",
+        "batch_quota_trimmed": "Dein Kontingent reicht nur noch für {n} Lektionen; die übrigen Themen wurden übersprungen.",
+        "ai_estimate": "≈ {tokens} Prompt-Tokens, Antwort bis {max_tokens} Tokens, höchstens {cost:.4f} $",
+        "ai_steps_trimmed": "Lange Schrittlisten wurden gekürzt, um die Anfrage klein zu halten.",
+        "similar_topic_reused": "Lektion eines ähnlichen Themas wiederverwendet: {topic}",
+        "generate_fresh_button": "Für genau dieses Thema neu generieren",
+        "generation_running": "Eine Lektion zu „{topic}“ wird noch erzeugt. Warte, bis sie fertig ist, und versuche es dann erneut."
     }
 }
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""
+The AI lesson prompt, shared by the page and the batch CLI
+(modules/batch_generate.py) so both send identical requests and hit the
+same response cache entries.
+
+build_prompt() keeps requests predictable: method steps are trimmed to a
+token budget, the requested answer length and `max_tokens` follow the size
+of the lesson (methods x steps), and the result carries a local token and
+cost estimate (no network call).
+"""
+import math
+from dataclasses import dataclass
+
+AI_MODEL = "gpt-4o-mini"
+PROMPT_VERSION = 3  # bump whenever the prompt text below changes
+
+WORDS_PER_METHOD = 60       # adapted title, objective, before/after activity
+WORDS_PER_STEP = 20         # one adapted instruction
+MIN_OUTPUT_WORDS = 150
+MAX_OUTPUT_WORDS = 1000
+TOKENS_PER_WORD = 2.0       # generous: Czech/German words split into several tokens
+STEPS_TOKEN_BUDGET = 1200   # all methods' steps together
+MAX_STEP_CHARS = 300        # a single step longer than this is shortened first
+
+# USD per 1M (input, output) tokens
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+@dataclass(frozen=True)
+class LessonPrompt:
+    prompt: str
+    words: int            # requested answer length
+    input_tokens: int
+    max_tokens: int
+    cost: float | None    # upper bound in USD (None for unknown models)
+    trimmed: bool = False
+
+
+def estimate_tokens(text):
+    """Rough token count: ~4 ASCII characters per token, accented/non-Latin ones count more."""
+    ascii_chars = sum(c.isascii() for c in text)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+def estimate_cost(input_tokens, output_tokens, model=AI_MODEL):
+    price = PRICES.get(model)
+    if price is None:
+        return None
+    return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+
+def output_words(step_counts):
+    """Answer length to ask for, given each method's number of steps."""
+    words = sum(WORDS_PER_METHOD + WORDS_PER_STEP * n for n in step_counts)
+    return min(max(words, MIN_OUTPUT_WORDS), MAX_OUTPUT_WORDS)
+
+
+def output_tokens(words):
+    return math.ceil(words * TOKENS_PER_WORD) + 20
+
+
+def method_steps(method):
+    """"Name — 1. Title: description ..." for a method with its steps loaded."""
+    # Steps are already parsed and sorted by `order`
+    steps_text = "\n".join(
+        f"{s.order if s.order is not None else i+1}. {s.title}: {s.description}"
+        for i, s in enumerate(method.steps or ())
+    )
+    return f"{method.name} — {steps_text}"
+
+
+def _shorten(line, chars):
+    return line if len(line) <= chars else line[:chars].rstrip() + "…"
+
+
+def trim_steps(fragment, budget):
+    """
+    A method_steps() fragment cut down to about `budget` tokens: long steps
+    are shortened first, then trailing steps are dropped.
+    """
+    if estimate_tokens(fragment) <= budget:
+        return fragment
+    lines = [_shorten(line, MAX_STEP_CHARS) for line in fragment.split("\n")]
+
+    kept, used = [], 0
+    for i, line in enumerate(lines):
+        cost = estimate_tokens(line) + 1
+        if kept and used + cost > budget:
+            kept.append(f"… ({len(lines) - i} more steps)")
+            break
+        kept.append(line if used + cost <= budget else _shorten(line, budget * 4))
+        used += cost
+    return "\n".join(kept)
+
+
+def build_prompt(topic, methods_steps, lang, step_counts=None,
+                 budget=STEPS_TOKEN_BUDGET, model=AI_MODEL):
+    """
+    `methods_steps` are method_steps() fragments and `step_counts` the
+    number of steps of each method (counted from the fragments if omitted).
+    """
+    if step_counts is None:
+        step_counts = [fragment.count("\n") + 1 for fragment in methods_steps]
+    words = output_words(step_counts)
+    per_method = budget // max(len(methods_steps), 1)
+    steps = [trim_steps(fragment, per_method) for fragment in methods_steps]
+
+    prompt = f"""
+    You are an expert instructional designer.
+    Adapt the following teaching methods to re-create lesson outlines tailored for the topic "{topic}".
+
+    Methods and their ordered steps:
+    {chr(10).join(steps)}
+
+    For each method, provide:
+    - A concise adapted title
+    - One clear learning objective
+    - Ordered step-by-step instructions
+    - One before-activity and one after-activity
+    Keep total under {words} words. Use {lang} language, unless the topic "{topic}" in another language (then use that language).
+    """
+    input_tokens = estimate_tokens(prompt)
+    max_tokens = output_tokens(words)
+    return LessonPrompt(
+        prompt=prompt,
+        words=words,
+        input_tokens=input_tokens,
+        max_tokens=max_tokens,
+        cost=estimate_cost(input_tokens, max_tokens, model),
+        trimmed=steps != list(methods_steps),
+    )
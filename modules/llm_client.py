@@ -0,0 +1,83 @@
+"""
+Process-wide LLM client.
+
+Building an `OpenAI(...)` per generation costs a new connection pool and a
+TLS handshake every time. `get_backend()` hands every caller (page
+sessions, worker threads, scripts) one shared backend per configuration,
+whose HTTP connections stay warm between calls.
+
+A backend streams text deltas for a chat prompt:
+
+    backend = get_backend(api_key)
+    for delta in backend.stream(messages, model="gpt-4o-mini", max_tokens=580):
+        ...
+
+`LLM_BACKEND=fake` swaps in the offline FakeBackend (modules/local_llm.py),
+and `OPENAI_BASE_URL` can point the real client at LocalLLMServer.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+
+CONNECT_TIMEOUT = 5.0   # seconds to open a connection
+READ_TIMEOUT = 60.0     # seconds without data before a call fails
+MAX_RETRIES = 2         # retries on connection errors, 429 and 5xx
+
+
+class LLMBackend(ABC):
+    @abstractmethod
+    def stream(self, messages, model, max_tokens):
+        """Yield the answer as text deltas."""
+
+    def complete(self, messages, model, max_tokens):
+        return "".join(self.stream(messages, model, max_tokens))
+
+
+class OpenAIBackend(LLMBackend):
+    """One OpenAI client (and its keep-alive connection pool) shared by all threads."""
+
+    def __init__(self, api_key, base_url=None, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, max_retries=MAX_RETRIES):
+        from openai import OpenAI, Timeout
+
+        self._client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=Timeout(read_timeout, connect=connect_timeout),
+            max_retries=max_retries,
+        )
+
+    def stream(self, messages, model, max_tokens):
+        stream = self._client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+_backends = {}
+_lock = threading.Lock()
+
+
+def get_backend(api_key=None, kind=None, base_url=None):
+    """The shared backend for this configuration, created on first use."""
+    kind = kind or os.getenv("LLM_BACKEND", "openai")
+    base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+    key = (kind, api_key, base_url)
+    with _lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if kind == "fake":
+                from modules.local_llm import FakeBackend
+                backend = FakeBackend()
+            elif kind == "openai":
+                backend = OpenAIBackend(api_key, base_url=base_url)
+            else:
+                raise ValueError(f"Unknown LLM backend: {kind}")
+            _backends[key] = backend
+        return backend
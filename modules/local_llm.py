@@ -0,0 +1,156 @@
+"""
+Offline stand-ins for the OpenAI chat API.
+
+FakeBackend answers in-process with a deterministic lesson-shaped text and
+a configurable latency. LocalLLMServer serves the same answers over HTTP in
+the OpenAI wire format (including `stream=True` server-sent events), so the
+real client, its connection pool and retries can be exercised without the
+network:
+
+    with LocalLLMServer(latency=0.2) as server:
+        backend = OpenAIBackend("test-key", base_url=server.url)
+        print(backend.complete([{"role": "user", "content": "Hi"}], "fake", 100))
+"""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modules.llm_client import LLMBackend
+
+_TOPIC = re.compile(r'topic "([^"]*)"')
+
+
+class FakeBackend(LLMBackend):
+    def __init__(self, latency=0.0, chunk_delay=0.0, words=None):
+        self.latency = latency          # seconds before the first delta
+        self.chunk_delay = chunk_delay  # seconds between deltas
+        self.words = words              # cap on answer length (default: max_tokens)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def reply(self, messages, max_tokens):
+        prompt = messages[-1]["content"] if messages else ""
+        m = _TOPIC.search(prompt)
+        topic = m.group(1) if m else "the topic"
+        words = [f"Lesson outline for {topic}."]
+        words += [f"step{i}" for i in range(1, (self.words or max_tokens) // 2)]
+        return words
+
+    def stream(self, messages, model, max_tokens):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        for i, word in enumerate(self.reply(messages, max_tokens)):
+            if i and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield word if i == 0 else " " + word
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        backend = self.server.backend
+        messages = body.get("messages", [])
+        model = body.get("model", "fake")
+        deltas = backend.stream(messages, model, body.get("max_tokens") or 256)
+        self.server.requests += 1
+
+        if not body.get("stream"):
+            text = "".join(deltas)
+            self._send_json({
+                "id": "chatcmpl-local",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for delta in deltas:
+            self._send_event(self._chunk(model, {"content": delta}, None))
+        self._send_event(self._chunk(model, {}, "stop"))
+        self._send_event("[DONE]")
+        self._write_chunk(b"")
+
+    @staticmethod
+    def _chunk(model, delta, finish_reason):
+        return json.dumps({
+            "id": "chatcmpl-local",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        })
+
+    def _send_event(self, data):
+        self._write_chunk(f"data: {data}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class LocalLLMServer:
+    """OpenAI-compatible HTTP server on localhost, backed by a FakeBackend."""
+
+    def __init__(self, backend=None, host="127.0.0.1", port=0, **fake_options):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.backend = backend or FakeBackend(**fake_options)
+        self._server.requests = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def backend(self):
+        return self._server.backend
+
+    @property
+    def requests(self):
+        return self._server.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,149 @@
+"""
+In-memory stand-in for the part of the supabase-py client the app uses.
+
+Tables are plain lists of dicts. Query builders support the same chained
+calls as PostgREST (`select`, `eq`, `lte`, `in_`, `order`, `range`, ...),
+and `rpc()` dispatches to Python mirrors of the SQL functions in `sql/`.
+Handy for running the catalog offline:
+
+    db = LocalPostgrest({"methods": [...], "method_visibility": [...]})
+    MethodCatalog(lambda previous: load_snapshot(db, previous))
+"""
+from datetime import date
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data) if isinstance(data, list) else None
+
+
+class Query:
+    def __init__(self, db, table):
+        self._db = db
+        self._table = table
+        self._columns = None
+        self._filters = []
+        self._order = []
+        self._range = None
+
+    # --- projection ---
+    def select(self, columns="*"):
+        cols = [c.strip() for c in columns.split(",")]
+        self._columns = None if "*" in cols else cols
+        return self
+
+    # --- filters ---
+    def _where(self, column, test):
+        self._filters.append(lambda row: test(row.get(column)))
+        return self
+
+    def eq(self, column, value):
+        return self._where(column, lambda v: v == value)
+
+    def neq(self, column, value):
+        return self._where(column, lambda v: v != value)
+
+    def gt(self, column, value):
+        return self._where(column, lambda v: v is not None and v > value)
+
+    def gte(self, column, value):
+        return self._where(column, lambda v: v is not None and v >= value)
+
+    def lt(self, column, value):
+        return self._where(column, lambda v: v is not None and v < value)
+
+    def lte(self, column, value):
+        return self._where(column, lambda v: v is not None and v <= value)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._where(column, lambda v: v in values)
+
+    # --- ordering / paging ---
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def limit(self, n):
+        self._range = (0, n - 1)
+        return self
+
+    def execute(self):
+        rows = [r for r in self._db.rows(self._table) if all(f(r) for f in self._filters)]
+
+        for column, desc in reversed(self._order):
+            rows.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+
+        if self._range:
+            start, end = self._range
+            rows = rows[start:end + 1]
+
+        if self._columns is not None:
+            rows = [{c: r.get(c) for c in self._columns} for r in rows]
+        else:
+            rows = [dict(r) for r in rows]
+        return Response(rows)
+
+
+class RpcCall:
+    def __init__(self, db, fn, params):
+        self._db = db
+        self._fn = fn
+        self._params = params or {}
+
+    def execute(self):
+        try:
+            fn = RPC[self._fn]
+        except KeyError:
+            raise RuntimeError(f"Unknown RPC function: {self._fn}")
+        return Response(fn(self._db, **self._params))
+
+
+class LocalPostgrest:
+    def __init__(self, tables=None):
+        self.tables = {
+            name: [dict(r) for r in rows] for name, rows in (tables or {}).items()
+        }
+
+    def rows(self, table):
+        return self.tables.get(table, [])
+
+    def table(self, name):
+        return Query(self, name)
+
+    def rpc(self, fn, params=None):
+        return RpcCall(self, fn, params)
+
+
+# ==================================================
+# SQL FUNCTION MIRRORS (keep in sync with sql/*.sql)
+# ==================================================
+
+def _visible_methods(db, p_tier, p_lang, p_day=None):
+    day = str(p_day or date.today().isoformat())
+    ids = {
+        v["method_id"]
+        for v in db.rows("method_visibility")
+        if v.get("tier") == p_tier
+        and v.get("valid_from") and v.get("valid_to")
+        and str(v["valid_from"]) <= day <= str(v["valid_to"])
+    }
+
+    best = {}
+    for m in db.rows("methods"):
+        if m["id"] not in ids or m.get("language_code") not in (p_lang, "en"):
+            continue
+        if m["id"] not in best or m.get("language_code") == p_lang:
+            best[m["id"]] = m
+
+    return [dict(best[k]) for k in sorted(best)]
+
+
+RPC = {
+    "visible_methods": _visible_methods,
+}
@@ -0,0 +1,541 @@
+"""
+Process-wide method catalog.
+
+Every method (in every language) and every visibility window is loaded once
+into an immutable snapshot that all sessions share. Tier/lang/date views are
+computed from memory; refreshes run on a background thread so a page render
+never waits for Supabase once the first snapshot exists.
+"""
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from types import MappingProxyType
+
+from modules.db_operations import safe_json_load
+from modules.lesson_prompt import PROMPT_VERSION, method_steps
+from modules.method_ranges import parse_ages, parse_minutes
+from utils.data import Method, MethodStep
+
+log = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000          # PostgREST caps rows per request
+REFRESH_AFTER = 60        # seconds between (incremental) syncs
+RETRY_AFTER = 30          # seconds to wait after a failed refresh
+SYNC_OVERLAP = timedelta(seconds=60)  # re-read window for late-committing writes
+
+# The card list only needs these; the heavy JSON is fetched per opened card
+LIST_COLUMNS = (
+    "id, language_code, name, description, age_group, tags, time, tools, "
+    "step_text, block, updated_at"
+)
+DETAIL_COLUMNS = "id, language_code, content_md, before, after, tips"
+
+
+def fetch_all(client, table, columns="*", order="id", since=None, stamp="updated_at"):
+    """Read a whole table page by page (only rows stamped after `since` if given)."""
+    rows = []
+    start = 0
+    while True:
+        query = client.table(table).select(columns)
+        if since is not None:
+            query = query.gt(stamp, since)
+        batch = (
+            query
+            .order(order)
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+            .data
+        ) or []
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def _steps(row, column):
+    """Parse a steps JSON field into MethodSteps sorted by `order` (None if not selected)."""
+    if column not in row:
+        return None
+    parsed = safe_json_load(row[column])
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+
+    steps = []
+    for s in parsed:
+        if isinstance(s, dict):
+            steps.append(MethodStep(
+                title=str(s.get("title") or ""),
+                description=str(s.get("activity") or ""),
+                durationMin=s.get("minutes") or None,
+                order=s.get("order"),
+            ))
+        else:
+            steps.append(MethodStep(title="", description=str(s)))
+
+    return tuple(sorted(steps, key=lambda s: s.order or 0))
+
+
+def _strings(raw):
+    parsed = safe_json_load(raw)
+    if not isinstance(parsed, list):
+        parsed = [parsed]
+    return tuple(str(v) for v in parsed if v not in (None, ""))
+
+
+def _tips(row, code):
+    if "tips" not in row and f"tips_{code}" not in row:
+        return None
+    return _strings(row.get(f"tips_{code}") or row.get("tips"))
+
+
+def method_from_row(row):
+    """
+    Build a Method record from a `methods` row, parsing every JSON field once.
+    Detail fields (steps/before/after/tips) stay None for LIST_COLUMNS rows.
+    """
+    code = row.get("language_code") or "en"
+    age_group = _strings(row.get("age_group"))
+    time_min, time_max = parse_minutes(row.get("time"))
+    age_min, age_max = parse_ages(age_group)
+    try:
+        block = int(row["block"]) if row.get("block") is not None else None
+    except (TypeError, ValueError):
+        block = None
+
+    return Method(
+        id=row["id"],
+        name=row.get(f"name_{code}") or row.get("name") or "",
+        description=row.get(f"description_{code}") or row.get("description") or "",
+        age_group=age_group,
+        time=row.get("time") or "",
+        materials=_strings(row.get("tools")),
+        steps=_steps(row, "content_md"),
+        tips=_tips(row, code),
+        videoUrl=row.get("videoUrl"),
+        language_code=code,
+        tags=_strings(row.get("tags")),
+        before=_steps(row, "before"),
+        after=_steps(row, "after"),
+        step_text=row.get("step_text") or "",
+        time_min=time_min,
+        time_max=time_max,
+        age_min=age_min,
+        age_max=age_max,
+        block=block,
+        updated_at=str(row["updated_at"]) if row.get("updated_at") else None,
+    )
+
+
+def pick_language(methods, lang, ids=None):
+    """
+    Best row per method id: `lang` when translated, else English (flagged
+    with is_fallback). Input order is kept.
+    """
+    best = {}
+    for m in methods:
+        if ids is not None and m.id not in ids:
+            continue
+        if m.language_code == lang:
+            best[m.id] = m
+        elif m.language_code == "en" and m.id not in best:
+            best[m.id] = replace(m, is_fallback=True)
+    return tuple(best.values())
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of the `methods` and `method_visibility` tables.
+    `watermark` is the newest `updated_at` seen (None for an empty catalog).
+    """
+
+    __slots__ = ("methods", "visibility", "watermark", "_views", "_day", "_details", "_fragments")
+
+    def __init__(self, methods, visibility, watermark=None, details=None, fragments=None):
+        # (id, language_code) -> Method, in table order
+        self.methods = MappingProxyType(dict(methods))
+        self.visibility = tuple(MappingProxyType(dict(v)) for v in visibility)
+        self.watermark = watermark
+        self._views = {}
+        # newest day a view was built for; older days are dropped from _views
+        self._day = ""
+        # (id, language_code) -> Method with detail fields loaded
+        self._details = dict(details or {})
+        # (id, language_code, updated_at, prompt version) -> AI prompt text of the method
+        self._fragments = dict(fragments or {})
+
+    @classmethod
+    def from_rows(cls, rows, visibility, watermark=None):
+        return cls(
+            {(m.id, m.language_code): m for m in map(method_from_row, rows)},
+            visibility,
+            watermark,
+        )
+
+    def apply(self, changed, deleted, visibility=None, watermark=None):
+        """
+        New snapshot with `changed` Method records upserted and `deleted`
+        (id, language_code) keys removed. The watermark always moves forward;
+        self is returned only when neither rows nor watermark change.
+        """
+        methods = dict(self.methods)
+        # Records carry updated_at, so a detail-only edit differs here too
+        stale = {key for key in deleted if methods.pop(key, None) is not None}
+        for m in changed:
+            key = (m.id, m.language_code)
+            if methods.get(key) != m:
+                methods[key] = m
+                stale.add(key)
+        dirty = bool(stale)
+
+        if visibility is not None and tuple(visibility) != self.visibility:
+            dirty = True
+        else:
+            visibility = self.visibility
+
+        watermark = max(filter(None, (watermark, self.watermark)), default=None)
+        if not dirty and watermark == self.watermark:
+            return self
+
+        # Keep loaded details and prompt fragments for methods this change did not touch
+        snapshot = CatalogSnapshot(
+            sorted(methods.items(), key=lambda kv: kv[0]),
+            visibility,
+            watermark,
+            {k: v for k, v in self._details.items() if k not in stale},
+            {k: v for k, v in self._fragments.items() if k[:2] not in stale},
+        )
+        if not dirty:
+            # Same rows, newer stamp: views built on them still hold
+            snapshot._views.update(self._views)
+            snapshot._day = self._day
+        return snapshot
+
+    @property
+    def version(self):
+        """
+        Stable across replicas that synced to the same point. Without a
+        watermark (rows carry no updated_at) it is a digest of the content,
+        so it is still the same in every process loading the same rows.
+        """
+        if self.watermark:
+            return self.watermark.isoformat()
+        return self.derived("version", lambda: "local-" + hashlib.sha1(
+            repr((tuple(self.methods.items()), self.visibility)).encode("utf-8")
+        ).hexdigest()[:16])
+
+    def derived(self, key, build):
+        """Per-snapshot memo for structures built from a view (search index, facets)."""
+        value = self._views.get(key)
+        if value is None:
+            value = self._views[key] = build()
+        return value
+
+    def detail(self, method, loader):
+        """
+        `method` with steps/before/after/tips loaded. `loader(id, language_code)`
+        returns a DETAIL_COLUMNS row and runs once per method per snapshot.
+        """
+        if method.steps is not None:
+            return method
+
+        key = (method.id, method.language_code)
+        full = self._details.get(key)
+        if full is None:
+            row = loader(method.id, method.language_code)
+            if not row:
+                return method
+            loaded = method_from_row({**row, "language_code": method.language_code})
+            full = replace(
+                self.methods.get(key, method),
+                steps=loaded.steps, before=loaded.before,
+                after=loaded.after, tips=loaded.tips,
+                is_fallback=False,
+            )
+            self._details[key] = full
+
+        return replace(full, is_fallback=True) if method.is_fallback else full
+
+    def prompt_fragment(self, method, loader):
+        """
+        The method's "name — ordered steps" prompt text, built once per
+        method version and PROMPT_VERSION (needs the steps, so it loads the
+        detail). Dropped together with the detail when a sync changes the row.
+        """
+        full = self.detail(method, loader)
+        key = (full.id, full.language_code, full.updated_at, PROMPT_VERSION)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = self._fragments[key] = method_steps(full)
+        return fragment
+
+    def by_id(self, lang):
+        """{id: Method} over every method in `lang` (English fallback), once per snapshot."""
+        return self.derived(
+            ("by_id", lang), lambda: {m.id: m for m in pick_language(self.methods.values(), lang)}
+        )
+
+    def visible_ids(self, tier, day):
+        return {
+            v["method_id"]
+            for v in self.visibility
+            if v.get("tier") == tier
+            and v.get("valid_from") and v.get("valid_to")
+            and str(v["valid_from"]) <= day <= str(v["valid_to"])
+        }
+
+    def _forget_before(self, day):
+        # A snapshot can serve for days; keep only views of today onwards.
+        # Day-scoped keys end in the day: (tier, lang, day), (kind, tier, lang, day)
+        self._day = day
+        for key in list(self._views):
+            if isinstance(key, tuple) and len(key) >= 3 and key[-1] < day:
+                self._views.pop(key, None)
+
+    def visible(self, tier, lang, day=None):
+        """Methods visible to `tier` on `day`, each in `lang` or English."""
+        day = day or date.today().isoformat()
+        key = (tier, lang, day)
+        view = self._views.get(key)
+        if view is not None:
+            return view
+
+        if day > self._day:
+            self._forget_before(day)
+
+        ids = self.visible_ids(tier, day)
+        view = pick_language(self.methods.values(), lang, ids) if ids else ()
+
+        # Views are immutable, so a racing duplicate computation is harmless
+        self._views[key] = view
+        return view
+
+
+def fetch_visible_methods(client, tier, lang, day=None):
+    """
+    One round trip: the `visible_methods` RPC (sql/visible_methods.sql)
+    resolves visibility and the per-method English fallback server-side.
+    """
+    rows = client.rpc("visible_methods", {
+        "p_tier": tier,
+        "p_lang": lang,
+        "p_day": day or date.today().isoformat(),
+    }).execute().data or []
+    return pick_language(map(method_from_row, rows), lang)
+
+
+def _stamp(value):
+    try:
+        return datetime.fromisoformat(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+def _newest(rows, column="updated_at"):
+    return max(filter(None, (_stamp(r.get(column)) for r in rows)), default=None)
+
+
+def fetch_method_detail(client, method_id, language_code):
+    rows = (
+        client.table("methods")
+        .select(DETAIL_COLUMNS)
+        .eq("id", method_id)
+        .eq("language_code", language_code)
+        .limit(1)
+        .execute()
+        .data
+    )
+    return rows[0] if rows else None
+
+
+def load_snapshot(client, previous=None):
+    """
+    Full download on first load (or while the catalog is empty), otherwise
+    an incremental sync on top of `previous`. Both need the `updated_at`
+    columns from sql/catalog_sync.sql.
+    """
+    if previous is not None and previous.watermark is not None:
+        return sync_snapshot(client, previous)
+
+    methods = fetch_all(client, "methods", LIST_COLUMNS)
+    visibility = fetch_all(client, "method_visibility", order="method_id")
+    return CatalogSnapshot.from_rows(methods, visibility, _newest(methods + visibility))
+
+
+def sync_snapshot(client, previous):
+    """
+    Apply rows changed since the watermark (sql/catalog_sync.sql). The
+    watermark advances to the newest stamp read even when no row differs,
+    so an idle catalog only re-reads the rows stamped within SYNC_OVERLAP
+    of its newest change; those compare equal and are ignored.
+    """
+    since = (previous.watermark - SYNC_OVERLAP).isoformat()
+
+    changed = fetch_all(client, "methods", LIST_COLUMNS, order="updated_at", since=since)
+    vis_changed = fetch_all(
+        client, "method_visibility", "method_id, updated_at",
+        order="updated_at", since=since,
+    )
+    deletions = fetch_all(
+        client, "catalog_deletions", order="deleted_at",
+        since=since, stamp="deleted_at",
+    )
+
+    # A row re-created after its tombstone wins over the tombstone
+    touched = {(r["id"], r.get("language_code") or "en"): _stamp(r.get("updated_at")) for r in changed}
+    deleted = []
+    for d in deletions:
+        if d.get("table_name") != "methods":
+            continue
+        key = (d["method_id"], d.get("language_code") or "en")
+        updated, stamp = touched.get(key), _stamp(d.get("deleted_at"))
+        if updated and stamp and updated > stamp:
+            continue
+        touched.pop(key, None)
+        deleted.append(key)
+
+    records = [
+        m for m in map(method_from_row, changed)
+        if (m.id, m.language_code) in touched
+    ]
+
+    # Visibility is tiny: re-read it whole when any window changed
+    visibility = None
+    if vis_changed or any(d.get("table_name") == "method_visibility" for d in deletions):
+        visibility = fetch_all(client, "method_visibility", order="method_id")
+
+    watermark = max(
+        filter(None, (
+            _newest(changed), _newest(vis_changed),
+            _newest(deletions, "deleted_at"),
+        )),
+        default=None,
+    )
+    return previous.apply(records, deleted, visibility, watermark)
+
+
+class MethodCatalog:
+    """
+    Holds the current CatalogSnapshot and swaps in fresh ones in the background.
+    `loader(previous)` returns the next snapshot (previous is None at first).
+
+    Without a `fallback` the very first load (per process) blocks the caller.
+    With one, the first snapshot loads in the background and views are served
+    by `fallback(tier, lang, day)` (e.g. fetch_visible_methods) until it lands;
+    each (tier, lang, day) is fetched once and shared by every view built on it.
+    """
+
+    def __init__(self, loader, refresh_after=REFRESH_AFTER, fallback=None, detail_loader=None):
+        self._loader = loader
+        self._fallback = fallback
+        self._detail_loader = detail_loader
+        self._refresh_after = refresh_after
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._checked_at = 0.0
+        self._last_attempt = 0.0
+        # fallback rows and views built on them, kept only while cold
+        self._cold = {}
+        self._cold_views = {}
+
+    def _install(self, snap):
+        self._snapshot = snap
+        self._cold.clear()
+        self._cold_views.clear()
+
+    def snapshot(self, wait=True):
+        snap = self._snapshot
+        if snap is None:
+            if not wait:
+                # a failed cold load is retried after RETRY_AFTER, not on every render
+                if time.time() - self._last_attempt > RETRY_AFTER:
+                    self.refresh_async()
+                return None
+            with self._lock:
+                if self._snapshot is None:
+                    self._install(self._loader(None))
+                    self._checked_at = self._last_attempt = time.time()
+            return self._snapshot
+
+        now = time.time()
+        if (
+            now - self._checked_at > self._refresh_after
+            and now - self._last_attempt > RETRY_AFTER
+        ):
+            self.refresh_async()
+        return snap
+
+    def refresh_async(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            self._last_attempt = time.time()
+
+        threading.Thread(
+            target=self._refresh, name="method-catalog-refresh", daemon=True
+        ).start()
+
+    def _refresh(self):
+        try:
+            self._install(self._loader(self._snapshot))
+            self._checked_at = time.time()
+        except Exception:
+            # keep serving the previous snapshot
+            log.exception("Method catalog refresh failed")
+        finally:
+            self._refreshing = False
+
+    def _fallback_view(self, tier, lang, day):
+        # a racing duplicate fetch while cold is harmless, just wasted
+        key = (tier, lang, day)
+        view = self._cold.get(key)
+        if view is None:
+            view = self._cold[key] = tuple(self._fallback(tier, lang, day))
+        return view
+
+    def visible_methods(self, tier, lang, day=None):
+        day = day or date.today().isoformat()
+        snap = self.snapshot(wait=self._fallback is None)
+        if snap is None:
+            return self._fallback_view(tier, lang, day)
+        return snap.visible(tier, lang, day)
+
+    def view_index(self, kind, tier, lang, build, day=None):
+        """
+        `build(methods)` over the (tier, lang, day) view, once per snapshot.
+        While the catalog is cold it is built once over the fallback rows.
+        """
+        day = day or date.today().isoformat()
+        snap = self.snapshot(wait=self._fallback is None)
+        if snap is None:
+            key = (kind, tier, lang, day)
+            value = self._cold_views.get(key)
+            if value is None:
+                value = self._cold_views[key] = build(self._fallback_view(tier, lang, day))
+            return value
+        return snap.derived(
+            (kind, tier, lang, day), lambda: build(snap.visible(tier, lang, day))
+        )
+
+    def version(self):
+        """Version of the snapshot serving views (None while cold)."""
+        snap = self._snapshot
+        return snap.version if snap is not None else None
+
+    def method_detail(self, method):
+        """Full record for an opened card (see CatalogSnapshot.detail)."""
+        snap = self._snapshot
+        if snap is None or self._detail_loader is None:
+            return method
+        return snap.detail(method, self._detail_loader)
+
+    def prompt_fragment(self, method):
+        """Prompt text of a method for AI generation (see CatalogSnapshot.prompt_fragment)."""
+        snap = self._snapshot
+        if snap is None or self._detail_loader is None:
+            return method_steps(method)
+        return snap.prompt_fragment(method, self._detail_loader)
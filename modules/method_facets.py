@@ -0,0 +1,99 @@
+"""
+Sidebar facet filters over a catalog view.
+
+For every facet the index keeps a boolean matrix (one row per facet value,
+one column per method), built once per catalog view (see
+MethodCatalog.view_index). Filtering is a vectorized OR within a facet and
+AND across facets; live counts are one masked row-sum per facet.
+"""
+import numpy as np
+
+# facet name -> values of a Method for that facet
+FACETS = {
+    "level": lambda m: m.age_group,
+    "time": lambda m: (m.time,) if m.time else (),
+    "materials": lambda m: m.materials,
+    "tags": lambda m: m.tags,
+}
+
+
+class FacetIndex:
+    __slots__ = ("methods", "values", "_matrices", "_value_pos", "_method_pos")
+
+    def __init__(self, methods, facets=FACETS):
+        self.methods = tuple(methods)
+        self._method_pos = {m.id: i for i, m in enumerate(self.methods)}
+        self.values = {}
+        self._matrices = {}
+        self._value_pos = {}
+
+        n = len(self.methods)
+        for name, get in facets.items():
+            per_method = [tuple(get(m) or ()) for m in self.methods]
+            values = sorted({v for vals in per_method for v in vals}, key=str)
+            pos = {v: i for i, v in enumerate(values)}
+
+            matrix = np.zeros((len(values), n), dtype=bool)
+            for j, vals in enumerate(per_method):
+                for v in vals:
+                    matrix[pos[v], j] = True
+
+            self.values[name] = values
+            self._value_pos[name] = pos
+            self._matrices[name] = matrix
+
+    def all(self):
+        return np.ones(len(self.methods), dtype=bool)
+
+    def first(self, n):
+        """Mask of the first `n` methods (the entitlement quota)."""
+        return np.arange(len(self.methods)) < n
+
+    def of(self, methods):
+        """Mask of the given methods (e.g. search results)."""
+        mask = np.zeros(len(self.methods), dtype=bool)
+        idx = [self._method_pos[m.id] for m in methods if m.id in self._method_pos]
+        mask[idx] = True
+        return mask
+
+    def known(self, selected):
+        """
+        `selected` without the values this view does not have (e.g. tags
+        picked in another language); facets the index lacks are dropped.
+        """
+        return {
+            name: [v for v in chosen if v in self._value_pos[name]]
+            for name, chosen in selected.items()
+            if name in self._value_pos
+        }
+
+    def mask(self, selected, base=None, exclude=None):
+        """
+        Methods matching any selected value of each facet, for all facets
+        (except `exclude`), within `base`. Unknown values are ignored, so a
+        facet whose selection is all unknown does not filter.
+        """
+        mask = self.all() if base is None else base.copy()
+        for name, chosen in selected.items():
+            if name == exclude or not chosen or name not in self._matrices:
+                continue
+            rows = [self._value_pos[name][v] for v in chosen if v in self._value_pos[name]]
+            if not rows:
+                continue
+            mask &= self._matrices[name][rows].any(axis=0)
+        return mask
+
+    def counts(self, name, selected, base=None):
+        """{value: matching methods} for a facet, given the other facets' selections."""
+        mask = self.mask(selected, base, exclude=name)
+        counts = np.count_nonzero(self._matrices[name] & mask, axis=1)
+        return dict(zip(self.values[name], counts.tolist()))
+
+    def select(self, mask, ordered=None):
+        """Methods under `mask`, in catalog order or in the order of `ordered`."""
+        if ordered is None:
+            return [self.methods[i] for i in np.flatnonzero(mask)]
+        return [
+            m for m in ordered
+            if m.id in self._method_pos and mask[self._method_pos[m.id]]
+        ]
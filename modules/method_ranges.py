@@ -0,0 +1,219 @@
+"""
+Numeric time / age ranges for catalog methods.
+
+`time` is free text ("30–60 min", "1 h", "15+ min") and `age_group` is a
+list of labels ("1. stupeň ZŠ", "SŠ", "10–12 let"). Both are parsed once
+at catalog load into (min, max) integers, and RangeIndex answers queries
+like "fits in 20 minutes for age 10" with a sorted-array search.
+"""
+import re
+
+import numpy as np
+
+from modules.method_search import fold
+
+_NUMBERS = re.compile(r"(\d+(?:[.,]\d+)?)\.?\s*(?:(?:[-–—/]|do|to|a|bis)\s*(\d+(?:[.,]\d+)?)\.?)?\s*(\+)?")
+_QUANTITY = re.compile(r"(\d+(?:[.,]\d+)?)\.?\s*([a-z]*)")
+_RANGE = re.compile(r"[-–—/]|\b(?:do|to|a|bis)\b")
+_HOURS = {"h", "hod", "hodin", "hodina", "hodiny", "hour", "hours", "hr", "hrs",
+          "std", "stunde", "stunden", "heure", "heures", "hora", "horas"}
+_MINUTES = {"m", "min", "mins", "minut", "minuta", "minuty", "minute", "minutes",
+            "minuten", "minuto", "minutos"}
+# One school lesson ("vyučovací hodina") is 45 minutes
+LESSON_MINUTES = 45
+_LESSON_HOUR = re.compile(r"\bvyuc(?:ovaci|\.)\s*hod[a-z]*\.?")
+_LESSONS = {"vh", "lesson", "lessons", "unterrichtsstunde", "unterrichtsstunden"}
+_AGE_UNITS = re.compile(r"\b(let|rok|roku|roky|year|years|yrs|ans|anos|jahre|jahren)\b")
+_GRADE = re.compile(r"\b(trida|tridy|trid|rocnik|rocniku|rocniky|grade|grades|klasse|classe|curso)\b")
+
+OPEN_AGE = 99
+
+# Folded label -> (min age, max age). First match wins, so school stages
+# come before the generic school types. Labels of 3 letters or fewer must
+# match a whole word ("vs" but not "vsechny").
+AGE_LABELS = [
+    ("1. stupen", (6, 11)),
+    ("2. stupen", (11, 15)),
+    ("ms", (3, 6)),
+    ("preschool", (3, 6)),
+    ("kindergarten", (3, 6)),
+    ("maternelle", (3, 6)),
+    ("infantil", (3, 6)),
+    ("zs", (6, 15)),
+    ("primary", (6, 11)),
+    ("elementary", (6, 11)),
+    ("primaire", (6, 11)),
+    ("primaria", (6, 11)),
+    ("grundschule", (6, 10)),
+    ("lower secondary", (11, 15)),
+    ("college", (11, 15)),
+    ("ss", (15, 19)),
+    ("gymnazium", (11, 19)),
+    ("gymnasium", (10, 19)),
+    ("secondary", (11, 19)),
+    ("high school", (14, 19)),
+    ("lycee", (15, 18)),
+    ("secundaria", (12, 18)),
+    ("vs", (18, OPEN_AGE)),
+    ("universit", (18, OPEN_AGE)),
+    ("adult", (18, OPEN_AGE)),
+    ("dospel", (18, OPEN_AGE)),
+    ("erwachsen", (18, OPEN_AGE)),
+]
+_LABELS = [
+    (re.compile(r"(?<![a-z0-9])" + re.escape(label) + (r"(?![a-z0-9])" if len(label) <= 3 else "")), ages)
+    for label, ages in AGE_LABELS
+]
+
+
+def _number(text):
+    return float(text.replace(",", "."))
+
+
+def _unit(part):
+    """Minutes per unit of the first unit word in `part`, or None."""
+    for m in _QUANTITY.finditer(part):
+        if m.group(2) in _HOURS:
+            return 60
+        if m.group(2) in _LESSONS:
+            return LESSON_MINUTES
+        if m.group(2) in _MINUTES:
+            return 1
+    return None
+
+
+def _duration(part, unit):
+    """
+    Minutes of one end of a range: "1 h 30 min" -> 90, "1,5 h" -> 90. A bare
+    number takes `unit`, or minutes right after hours ("1 h 30").
+    """
+    total, found, scale = 0.0, False, None
+    for m in _QUANTITY.finditer(part):
+        word = m.group(2)
+        if word in _HOURS:
+            scale = 60
+        elif word in _LESSONS:
+            scale = LESSON_MINUTES
+        elif word in _MINUTES:
+            scale = 1
+        elif word:
+            continue  # "2x", "3 skupiny": a count, not a duration
+        else:
+            scale = 1 if scale == 60 else unit
+        total += _number(m.group(1)) * scale
+        found = True
+    return round(total) if found else None
+
+
+def parse_minutes(text):
+    """
+    "30–60 min" -> (30, 60), "30 min – 1 h" -> (30, 60), "1 h 30 min" ->
+    (90, 90), "1,5 h" -> (90, 90), "15+ min" -> (15, None),
+    "2 vyučovací hodiny" -> (90, 90).
+    """
+    if not text:
+        return None, None
+    folded = _LESSON_HOUR.sub("vh", fold(text))
+    open_ended = "+" in folded
+    parts = [p for p in _RANGE.split(folded.replace("+", " "), maxsplit=1) if _QUANTITY.search(p)]
+    if not parts:
+        return None, None
+
+    # "30–60 min": a bare end takes the unit of the other end (minutes by default)
+    units = [_unit(p) for p in parts]
+    ends = [
+        _duration(p, units[i] or next((u for u in units[i + 1:] + units[:i] if u), 1))
+        for i, p in enumerate(parts)
+    ]
+    ends = [e for e in ends if e is not None]
+    if not ends:
+        return None, None
+
+    lo = ends[0]
+    if len(ends) > 1:
+        hi = ends[1]
+    else:
+        hi = None if open_ended else lo
+    if hi is not None and hi < lo:
+        lo, hi = hi, lo
+    return lo, hi
+
+
+def _numeric_ages(m, grade=False):
+    lo = int(_number(m.group(1)))
+    hi = int(_number(m.group(2))) if m.group(2) else (OPEN_AGE if m.group(3) else lo)
+    if grade:
+        # school grade -> pupil age (1st grade ~ 6-7 years)
+        lo, hi = lo + 5, hi + 6 if hi != OPEN_AGE else OPEN_AGE
+    return min(lo, hi), max(lo, hi)
+
+
+def _age_range(label):
+    folded = fold(label)
+    m = _NUMBERS.search(folded)
+
+    # "10–12 let", "3.–5. třída", "1.–9. ročník"
+    if m and _AGE_UNITS.search(folded):
+        return _numeric_ages(m)
+    if m and _GRADE.search(folded):
+        return _numeric_ages(m, grade=True)
+
+    # "1. stupeň ZŠ", "SŠ", "Primary"
+    for pattern, ages in _LABELS:
+        if pattern.search(folded):
+            return ages
+
+    # bare "10-12"
+    return _numeric_ages(m) if m else None
+
+
+def parse_ages(labels):
+    """Union of the age ranges of all labels, or (None, None) if none parse."""
+    ranges = [r for r in map(_age_range, labels or ()) if r]
+    if not ranges:
+        return None, None
+    return min(r[0] for r in ranges), max(r[1] for r in ranges)
+
+
+class RangeIndex:
+    """
+    Methods sorted by minimum duration, plus age bounds, over one catalog
+    view (positions match FacetIndex for the same view).
+    """
+
+    __slots__ = ("methods", "_order", "_time_min", "_age_min", "_age_max")
+
+    def __init__(self, methods):
+        self.methods = tuple(methods)
+
+        time_min = np.array(
+            [m.time_min if m.time_min is not None else np.inf for m in self.methods],
+            dtype=float,
+        )
+        self._order = np.argsort(time_min, kind="stable")
+        self._time_min = time_min[self._order]
+
+        # unknown ages match every age
+        self._age_min = np.array(
+            [m.age_min if m.age_min is not None else 0 for m in self.methods], dtype=float
+        )
+        self._age_max = np.array(
+            [m.age_max if m.age_max is not None else OPEN_AGE for m in self.methods], dtype=float
+        )
+
+    def mask(self, minutes=None, age=None):
+        """
+        Methods whose shortest version fits in `minutes` and whose age range
+        covers `age`. Methods with unparsable time never fit a time limit.
+        """
+        mask = np.ones(len(self.methods), dtype=bool)
+        if minutes is not None:
+            fits = np.zeros(len(self.methods), dtype=bool)
+            fits[self._order[:np.searchsorted(self._time_min, minutes, side="right")]] = True
+            mask &= fits
+        if age is not None:
+            mask &= (self._age_min <= age) & (age <= self._age_max)
+        return mask
+
+    def fitting(self, minutes=None, age=None):
+        return [self.methods[i] for i in np.flatnonzero(self.mask(minutes, age))]
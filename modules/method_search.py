@@ -0,0 +1,126 @@
+"""
+In-memory full-text search over catalog Method records.
+
+An inverted index is built once per catalog view (see
+MethodCatalog.view_index) and answers ranked queries without touching
+Supabase. Text is folded to lowercase ASCII, so "prace" finds "práce" and
+"strasse" finds "Straße". Query words also match as prefixes, which covers
+half-typed words and inflected endings ("skupin" finds "skupinách").
+"""
+import bisect
+import math
+import re
+import unicodedata
+
+# Field weights for ranking
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "tags": 2.0,
+    "tools": 1.5,
+    "description": 1.0,
+    "steps": 0.5,
+}
+
+PREFIX_FACTOR = 0.6     # partial-word matches rank below whole words
+MIN_PREFIX = 2          # shortest query word expanded as a prefix
+MAX_EXPANSIONS = 50     # vocabulary terms one prefix may expand to
+
+# Letters NFKD does not decompose
+_LIGATURES = str.maketrans({
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th",
+})
+
+STOPWORDS = {
+    "en": {"a", "an", "and", "the", "of", "to", "in", "on", "for", "with", "is", "are"},
+    "cs": {"a", "i", "k", "o", "s", "v", "z", "na", "do", "se", "je", "pro", "ve", "ze", "to"},
+    "fr": {"le", "la", "les", "un", "une", "des", "de", "du", "et", "en", "a", "au", "aux", "pour"},
+    "es": {"el", "la", "los", "las", "un", "una", "de", "del", "y", "en", "a", "con", "para"},
+    "de": {"der", "die", "das", "ein", "eine", "und", "in", "im", "zu", "mit", "fur", "von"},
+}
+
+_WORD = re.compile(r"\w+")
+
+
+def fold(text):
+    """Lowercase and strip diacritics: "Práce ve Skupinách" -> "prace ve skupinach"."""
+    text = unicodedata.normalize("NFKD", str(text).casefold().translate(_LIGATURES))
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text, lang="en"):
+    stop = STOPWORDS.get(lang, ())
+    return [w for w in _WORD.findall(fold(text)) if w not in stop]
+
+
+def _fields(m):
+    steps = " ".join(f"{s.title} {s.description}" for s in (m.steps or ()))
+    return {
+        "name": m.name,
+        "tags": " ".join(m.tags or ()),
+        "tools": " ".join(m.materials or ()),
+        "description": m.description,
+        "steps": f"{m.step_text} {steps}",
+    }
+
+
+class SearchIndex:
+    __slots__ = ("methods", "lang", "_postings", "_vocab", "_idf")
+
+    def __init__(self, methods, lang="en"):
+        self.methods = tuple(methods)
+        self.lang = lang
+
+        # term -> {doc position: summed field weight}
+        postings = {}
+        for pos, m in enumerate(self.methods):
+            for field, text in _fields(m).items():
+                weight = FIELD_WEIGHTS[field]
+                for term in tokenize(text, lang):
+                    docs = postings.setdefault(term, {})
+                    docs[pos] = docs.get(pos, 0.0) + weight
+
+        n = max(len(self.methods), 1)
+        self._postings = postings
+        self._vocab = sorted(postings)
+        self._idf = {t: math.log(1 + n / len(d)) for t, d in postings.items()}
+
+    def _expand(self, word):
+        """Vocabulary terms a query word matches, with their match factor."""
+        terms = {}
+        if word in self._postings:
+            terms[word] = 1.0
+        if len(word) >= MIN_PREFIX:
+            i = bisect.bisect_left(self._vocab, word)
+            for term in self._vocab[i:i + MAX_EXPANSIONS]:
+                if not term.startswith(word):
+                    break
+                terms.setdefault(term, PREFIX_FACTOR)
+        return terms
+
+    def search(self, query, limit=None):
+        """Methods matching every query word, best first."""
+        words = tokenize(query, self.lang)
+        if not words:
+            return list(self.methods)
+
+        scores = None
+        for word in words:
+            word_scores = {}
+            for term, factor in self._expand(word).items():
+                idf = self._idf[term]
+                for pos, weight in self._postings[term].items():
+                    s = weight * idf * factor
+                    if s > word_scores.get(pos, 0.0):
+                        word_scores[pos] = s
+
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {p: s + word_scores[p] for p, s in scores.items() if p in word_scores}
+            if not scores:
+                return []
+
+        ranked = sorted(scores, key=lambda p: (-scores[p], p))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.methods[p] for p in ranked]
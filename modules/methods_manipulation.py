@@ -1,35 +1,317 @@
-import streamlit as st
+import math
 import random
+from collections import Counter, deque
 
+import numpy as np
 
-def select_suitable_methods(methods, total_max_duration, block_allocations):
-    random.shuffle(methods)
-    suitable_methods = []
-    total_duration = 0
-    block_count = {}
-    
-    # Max duration for each block
-    block_durations = {block: total_max_duration * (block_allocations[block] / 100) for block in block_allocations}
-
-    for method in methods:
-        method_id, method_name, description, duration, age_group, block, subject, topic, tools, sources = method
-        block = int(block)  # Ensure block is treated as an integer
-        
-        # Respect block time allocation and max total duration
-        if block_count.get(block, 0) < 3:  # No more than 3 methods per block
-            if total_duration + duration <= total_max_duration:  # Ensure overall total duration is respected
-                block_remaining_duration = block_durations.get(block, 0) - block_count.get(block, 0) * duration
-                
-                # Ensure block-specific time limit
-                if block_remaining_duration >= duration:
-                    block_count[block] = block_count.get(block, 0) + 1
-                    suitable_methods.append(method)
-                    total_duration += duration
-
-        if total_duration >= total_max_duration:
-            break
+from modules.lru_cache import LRUCache
+from modules.method_ranges import parse_ages
+
+MAX_PER_BLOCK = 3  # no more than 3 methods per block
+
+# (catalog version, minutes, allocations, filters, seed) -> plan
+_PLAN_CACHE = LRUCache(maxsize=1024)
+
+
+def _minutes(method):
+    duration = method[3]
+    return int(round(duration)) if duration is not None else 0
+
+
+def block_capacities(total_max_duration, block_allocations):
+    """Whole minutes available to each block (allocations are percentages)."""
+    return {
+        int(block): int(math.floor(total_max_duration * pct / 100 + 1e-9))
+        for block, pct in block_allocations.items()
+    }
+
+
+def _block_options(candidates, capacity):
+    """
+    Exact optimum for one block: {minutes used: (score, picks)} over every
+    choice of at most MAX_PER_BLOCK methods fitting in `capacity`.
+
+    `candidates` are (method, minutes, score). Methods of equal length are
+    interchangeable for time, so each length only ever contributes its best
+    scored methods; the DP runs over distinct lengths, not over methods.
+    """
+    groups = {}
+    for m, d, sc in candidates:
+        if 0 < d <= capacity:
+            groups.setdefault(d, []).append((m, sc))
+
+    # (count, minutes) -> (score, picks)
+    states = {(0, 0): (0.0, ())}
+    for d, group in groups.items():
+        group.sort(key=lambda ms: ms[1], reverse=True)  # stable: keeps input order on ties
+        group = group[:MAX_PER_BLOCK]
+
+        for (k, t), (s, picks) in list(states.items()):
+            gained = 0.0
+            for j in range(1, min(len(group), MAX_PER_BLOCK - k) + 1):
+                t2 = t + j * d
+                if t2 > capacity:
+                    break
+                gained += group[j - 1][1]
+                key = (k + j, t2)
+                if key not in states or s + gained > states[key][0]:
+                    states[key] = (s + gained, picks + tuple(m for m, _ in group[:j]))
+
+    options = {}
+    for (_, t), (s, picks) in states.items():
+        if t not in options or s > options[t][0]:
+            options[t] = (s, picks)
+    return options
+
+
+def optimize_lesson(methods, total_max_duration, block_allocations, score=None, objective=None):
+    """
+    Exact lesson plan: at most MAX_PER_BLOCK methods per block, each block
+    within its percentage of the time, everything within the total.
+
+    `score(method)` adds a secondary value per method (default 0) and
+    `objective(minutes, score)` ranks whole plans; the default fills as
+    much of the time as possible and breaks ties on score. Any objective
+    that never prefers a lower score at equal minutes gives an exact result.
+    Ties between equal methods go to the earlier one in `methods`.
+    """
+    score = score or (lambda m: 0.0)
+    objective = objective or (lambda minutes, s: (minutes, s))
+    total = int(math.floor(total_max_duration + 1e-9))
+
+    by_block = {}
+    for m in methods:
+        try:
+            block = int(m[5])
+        except (TypeError, ValueError):
+            continue
+        by_block.setdefault(block, []).append((m, _minutes(m), score(m)))
+
+    # Combine blocks: total minutes -> (score, picks)
+    plans = {0: (0.0, ())}
+    for block, capacity in block_capacities(total, block_allocations).items():
+        options = _block_options(by_block.get(block, ()), min(capacity, total))
+        combined = {}
+        for t, (s, picks) in plans.items():
+            for bt, (bs, bpicks) in options.items():
+                t2 = t + bt
+                if t2 > total:
+                    continue
+                if t2 not in combined or s + bs > combined[t2][0]:
+                    combined[t2] = (s + bs, picks + bpicks)
+        plans = combined
+
+    best = max(plans, key=lambda t: objective(t, plans[t][0]))
+    return list(plans[best][1])
+
+
+def select_suitable_methods(methods, total_max_duration, block_allocations,
+                            score=None, objective=None, seed=None):
+    """
+    One lesson plan. The seed picks among equally good plans: the same seed
+    and methods always give the same plan, seed=None a random one.
+    `methods` is never modified.
+    """
+    shuffled = list(methods)
+    random.Random(seed).shuffle(shuffled)
+    return optimize_lesson(shuffled, total_max_duration, block_allocations, score, objective)
+
+
+def plan_lesson(methods, total_max_duration, block_allocations, seed, catalog_version, filters=None):
+    """
+    Memoized select_suitable_methods for shareable plans.
 
-    return suitable_methods
+    `catalog_version` identifies the catalog snapshot and `filters` whatever
+    narrowed it down to `methods` (tier, language, age, ...); together with
+    the duration, allocations and seed they fully determine the plan, so a
+    repeated request or an opened plan URL is served from the LRU.
+    Without a version (catalog still loading) nothing is cached.
+    """
+    if catalog_version is None:
+        return tuple(select_suitable_methods(
+            methods, total_max_duration, block_allocations, seed=seed
+        ))
 
+    key = (
+        catalog_version,
+        total_max_duration,
+        tuple(sorted(block_allocations.items())),
+        tuple(sorted((filters or {}).items())),
+        seed,
+    )
+    return _PLAN_CACHE.get_or_compute(
+        key,
+        lambda: tuple(select_suitable_methods(
+            methods, total_max_duration, block_allocations, seed=seed
+        )),
+    )
+
+
+def plan_course(methods, durations, block_allocations, repeat_window=5):
+    """
+    Plans a sequence of lessons in one incremental pass.
+
+    `durations` gives each lesson's length; `block_allocations` is one dict
+    for all lessons or a list with one per lesson. A method used in any of
+    the previous `repeat_window` lessons is not offered again, and among
+    plans using the same time the optimizer prefers methods used least so
+    far, which rotates every block through its whole pool. Each lesson is a
+    single exact optimize_lesson call; nothing is retried.
+    """
+    if isinstance(block_allocations, dict):
+        block_allocations = [block_allocations] * len(durations)
+
+    recent = deque(maxlen=repeat_window)
+    uses = Counter()
+    course = []
+
+    for duration, allocations in zip(durations, block_allocations):
+        blocked = set().union(*recent) if recent else set()
+        available = [m for m in methods if m[0] not in blocked]
+
+        lesson = optimize_lesson(
+            available, duration, allocations, score=lambda m: -uses[m[0]]
+        )
+
+        ids = {m[0] for m in lesson}
+        uses.update(ids)
+        if repeat_window:
+            recent.append(ids)
+        course.append(lesson)
+
+    return course
+
+
+# Default weights for ranking batch plans
+PLAN_WEIGHTS = {"time": 0.6, "variety": 0.25, "age": 0.15}
+
+
+def _random_orders(rng, rows, n, k):
+    """`rows` random sequences of k distinct indices out of range(n)."""
+    if n <= 4 * k:
+        # argsort of a random matrix: one permutation per row
+        return np.argsort(rng.random((rows, n)), axis=1)[:, :k]
+    # a full matrix would be rows x n; in a large pool repeats are rare, so
+    # draw with replacement and redraw only the rows that got one
+    order = rng.integers(0, n, size=(rows, k))
+    ordered = np.sort(order, axis=1)
+    for r in np.flatnonzero((ordered[:, 1:] == ordered[:, :-1]).any(axis=1)):
+        order[r] = rng.choice(n, size=k, replace=False)
+    return order
+
+
+def generate_lesson_plans(methods, total_max_duration, block_allocations,
+                          n_plans=3, n_candidates=256, age=None, weights=None, seed=None):
+    """
+    Several alternative lesson plans from one vectorized pass.
+
+    `n_candidates` random method orders are filled greedily side by side
+    (NumPy over the candidates, one step per position), respecting the same
+    limits as optimize_lesson. Plans are ranked by time fit, how many blocks
+    got a method, and (if `age` is given) how many methods suit that age.
+    Returns up to `n_plans` distinct plans, best first:
+        [{"methods": [...], "minutes": 40, "score": 0.93}, ...]
+    """
+    weights = {**PLAN_WEIGHTS, **(weights or {})}
+    total = int(math.floor(total_max_duration + 1e-9))
+    capacities = block_capacities(total, block_allocations)
+    blocks = [b for b, cap in capacities.items() if cap > 0]
+    block_pos = {b: i for i, b in enumerate(blocks)}
+    if not blocks:
+        return []
+
+    # Only methods that could ever be placed
+    pool, dur, blk, age_ok = [], [], [], []
+    age_ranges = {}  # labels -> parsed range; catalogs reuse a few label sets
+    for m in methods:
+        try:
+            b = block_pos.get(int(m[5]))
+        except (TypeError, ValueError):
+            continue
+        d = _minutes(m)
+        if b is None or not 0 < d <= min(capacities[blocks[b]], total):
+            continue
+        pool.append(m)
+        dur.append(d)
+        blk.append(b)
+        if age is not None:
+            labels = tuple(m[4] or ())
+            if labels not in age_ranges:
+                age_ranges[labels] = parse_ages(labels)
+            lo, hi = age_ranges[labels]
+            age_ok.append(lo is None or lo <= age <= hi)
+    if not pool:
+        return []
+
+    dur = np.array(dur)
+    blk = np.array(blk)
+    age_ok = np.array(age_ok, dtype=float) if age is not None else np.ones(len(pool))
+    caps = np.array([capacities[b] for b in blocks])
+
+    rng = np.random.default_rng(seed)
+    n_blocks = len(blocks)
+    max_picks = MAX_PER_BLOCK * n_blocks
+    # Each plan holds at most max_picks methods, so a short random prefix of
+    # every order suffices (the whole pool when it is small)
+    steps = min(len(pool), max(4 * max_picks, 32))
+    order = _random_orders(rng, n_candidates, len(pool), steps)
+
+    rows = np.arange(n_candidates)
+    used = np.zeros(n_candidates, dtype=int)
+    block_used = np.zeros((n_candidates, n_blocks), dtype=int)
+    block_count = np.zeros((n_candidates, n_blocks), dtype=int)
+    picks = np.full((n_candidates, max_picks), -1)
+    n_picked = np.zeros(n_candidates, dtype=int)
+
+    for step in range(steps):
+        idx = order[:, step]
+        d, b = dur[idx], blk[idx]
+        ok = (
+            (block_count[rows, b] < MAX_PER_BLOCK)
+            & (block_used[rows, b] + d <= caps[b])
+            & (used + d <= total)
+        )
+        ok_rows = rows[ok]
+        picks[ok_rows, n_picked[ok_rows]] = idx[ok]
+        n_picked[ok_rows] += 1
+        used[ok_rows] += d[ok]
+        block_used[ok_rows, b[ok]] += d[ok]
+        block_count[ok_rows, b[ok]] += 1
+
+    taken = picks >= 0
+    age_fit = np.where(taken, age_ok[np.where(taken, picks, 0)], 0).sum(axis=1) / np.maximum(n_picked, 1)
+    scores = (
+        weights["time"] * used / max(total, 1)
+        + weights["variety"] * (block_count > 0).sum(axis=1) / n_blocks
+        + weights["age"] * age_fit
+    )
+
+    plans, seen = [], set()
+    for i in np.argsort(-scores, kind="stable"):
+        chosen = picks[i, :n_picked[i]]
+        key = frozenset(chosen.tolist())
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        ordered = sorted(chosen.tolist(), key=lambda j: blocks[blk[j]])
+        plans.append({
+            "methods": [pool[j] for j in ordered],
+            "minutes": int(used[i]),
+            "score": float(scores[i]),
+        })
+        if len(plans) == n_plans:
+            break
+    return plans
 
 
+def catalog_planner_rows(methods):
+    """
+    Catalog Method records in the tuple shape select_suitable_methods unpacks.
+    The planned duration is the method's shortest time; methods without a
+    parsable time or a block are left out.
+    """
+    return [
+        (m.id, m.name, m.description, m.time_min, m.age_group, m.block, None, None, m.materials, None)
+        for m in methods
+        if m.time_min is not None and m.block is not None
+    ]
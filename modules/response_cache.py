@@ -0,0 +1,109 @@
+"""
+Cache of generated AI lessons.
+
+Entries are content-addressed: the key hashes the selected method ids, the
+normalized topic, the language, the model and the prompt version, so the
+same request from any session reuses one answer and a prompt change
+(bumping the version) never serves stale text. Recent entries live in an
+in-memory LRU; all entries are kept in a local SQLite file so they survive
+restarts.
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from modules.lru_cache import LRUCache
+from modules.method_search import fold
+
+log = logging.getLogger(__name__)
+
+MAX_ROWS = 50_000   # oldest entries beyond this are pruned from SQLite
+
+_PUNCT = re.compile(r"[^\w]+")
+
+
+def normalize_topic(topic):
+    """" Photosynthesis!! " -> "photosynthesis", "Fotosyntéza" -> "fotosynteza"."""
+    return " ".join(_PUNCT.sub(" ", fold(topic or "")).split())
+
+
+def response_key(method_ids, topic, lang, prompt_version, model=""):
+    payload = json.dumps(
+        [sorted(str(i) for i in method_ids), normalize_topic(topic), lang, prompt_version, model],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path, maxsize=512, max_rows=MAX_ROWS):
+        self.path = Path(path)
+        self.max_rows = max_rows
+        self._memory = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("pragma journal_mode=wal")
+        self._db.execute(
+            """
+            create table if not exists responses (
+                key text primary key,
+                response text not null,
+                topic text,
+                lang text,
+                prompt_version text,
+                created_at real not null
+            )
+            """
+        )
+        self._db.execute("create index if not exists responses_created on responses (created_at)")
+        self._db.commit()
+
+    def get(self, key):
+        """Cached response text for `key`, or None."""
+        text = self._memory.get(key)
+        if text is not None:
+            return text
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "select response from responses where key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            log.exception("Response cache read failed")
+            return None
+        if row is None:
+            return None
+        self._memory.put(key, row[0])
+        return row[0]
+
+    def put(self, key, text, topic=None, lang=None, prompt_version=None):
+        self._memory.put(key, text)
+        try:
+            with self._lock:
+                self._db.execute(
+                    "insert or replace into responses values (?, ?, ?, ?, ?, ?)",
+                    (key, text, normalize_topic(topic), lang, str(prompt_version), time.time()),
+                )
+                self._db.execute(
+                    """
+                    delete from responses where key in (
+                        select key from responses order by created_at desc limit -1 offset ?
+                    )
+                    """,
+                    (self.max_rows,),
+                )
+                self._db.commit()
+        except sqlite3.Error:
+            # the in-memory copy still serves this process
+            log.exception("Response cache write failed")
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("select count(*) from responses").fetchone()[0]
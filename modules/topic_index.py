@@ -0,0 +1,157 @@
+"""
+Near-duplicate lookup of AI topics, in front of the exact response cache.
+
+"Photosynthesis", "photosynthesis" spelled "fotosyntéza" or "The
+photosynthesis" should reuse one generated lesson for the same methods.
+Topics are folded, loosely transliterated ("ph" -> "f", "y" -> "i") and
+embedded as hashed character trigrams plus word stems (a unit vector in
+NumPy, no model download); a lookup is one matrix-vector product over the
+index.
+
+The trigrams tolerate spelling and language variants, the stems keep
+"addition of fractions" from matching "subtraction of fractions", and
+numbers must match exactly, so "World War I" never reuses "World War II".
+Similarity alone cannot tell a paraphrase from a narrower topic
+("Volcanoes of Iceland" scores 0.85 against "Volcanoes"), so a hit also
+needs every content word of each topic to have a counterpart in the other.
+The index is capped at `maxsize` topics and evicts the least recently
+used.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from modules.method_search import STOPWORDS
+from modules.response_cache import normalize_topic
+
+DIM = 512           # hashed feature buckets
+THRESHOLD = 0.75    # cosine similarity needed for a hit
+MAX_TOPICS = 5000
+STEM = 5            # word prefix compared as a whole ("volcano" ~ "volcanoes")
+WORD_MATCH = 0.5    # trigram overlap (Dice) for two words to count as the same
+
+_ALL_STOPWORDS = set().union(*STOPWORDS.values())
+_ROMAN = re.compile(r"^(?=[ivxlc]+$)(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})$")
+
+# spelling variants across languages: photosynthesis ~ fotosyntéza
+_SPELLING = [("ph", "f"), ("th", "t"), ("y", "i"), ("ck", "k"), ("qu", "kv"), ("w", "v")]
+
+
+def group_key(method_ids, lang, prompt_version, model=""):
+    """Topics are only compared with others generated for the same request shape."""
+    return (tuple(sorted(str(i) for i in method_ids)), lang, str(prompt_version), model)
+
+
+def _words(topic):
+    # the topic may be in another language than the UI, so drop every language's stopwords
+    words = [w for w in normalize_topic(topic).split() if w not in _ALL_STOPWORDS or _ROMAN.match(w)]
+    for a, b in _SPELLING:
+        words = [w.replace(a, b) for w in words]
+    return words
+
+
+def _guard(words):
+    """Words that must match exactly: numbers and roman numerals."""
+    return frozenset(w for w in words if any(c.isdigit() for c in w) or _ROMAN.match(w))
+
+
+def _trigrams(word):
+    return {f" {word} "[i:i + 3] for i in range(len(word))}
+
+
+def _same_word(a, b):
+    if a[:STEM] == b[:STEM]:
+        return True
+    ta, tb = _trigrams(a), _trigrams(b)
+    return 2 * len(ta & tb) / (len(ta) + len(tb)) >= WORD_MATCH
+
+
+def covers(words, others):
+    """Whether every word in `words` has a counterpart in `others`."""
+    return all(any(_same_word(w, o) for o in others) for w in words)
+
+
+def _hashed(features, dim):
+    vec = np.zeros(dim, dtype=np.float32)
+    for f in features:
+        h = zlib.crc32(f.encode("utf-8"))
+        # the sign bit keeps hash collisions from only adding up
+        vec[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def embed(words, dim=DIM):
+    """Unit vector; the cosine of two topics averages their trigram and stem similarity."""
+    trigrams = [f" {w} "[i:i + 3] for w in words for i in range(len(w))]
+    stems = [f"#{w[:STEM]}" for w in words]
+    return (_hashed(trigrams, dim) + _hashed(stems, dim)) * np.float32(0.5 ** 0.5)
+
+
+class TopicIndex:
+    def __init__(self, maxsize=MAX_TOPICS, threshold=THRESHOLD, dim=DIM):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.dim = dim
+        self._vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self._groups = np.full(maxsize, -1, dtype=np.int64)   # -1 = free slot
+        self._used = np.zeros(maxsize, dtype=np.int64)        # LRU clock per slot
+        self._entries = [None] * maxsize                      # (guard, cache key, topic, words)
+        self._group_ids = {}
+        self._slots = {}                                      # cache key -> slot
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def _group_id(self, group):
+        return self._group_ids.setdefault(group, len(self._group_ids))
+
+    def add(self, group, topic, cache_key):
+        words = _words(topic)
+        vec = embed(words, self.dim)
+        with self._lock:
+            self._clock += 1
+            slot = self._slots.get(cache_key)
+            if slot is None:
+                # a free slot, else the least recently used one
+                slot = int(np.argmin(self._used))
+                if self._entries[slot] is not None:
+                    del self._slots[self._entries[slot][1]]
+                self._slots[cache_key] = slot
+            self._vectors[slot] = vec
+            self._groups[slot] = self._group_id(group)
+            self._used[slot] = self._clock
+            self._entries[slot] = (_guard(words), cache_key, topic, tuple(words))
+
+    def lookup(self, group, topic):
+        """(cache key, original topic, similarity) of the closest topic above the threshold, or None."""
+        words = _words(topic)
+        vec = embed(words, self.dim)
+        guard = _guard(words)
+        with self._lock:
+            gid = self._group_ids.get(group)
+            if gid is None:
+                return None
+            scores = self._vectors @ vec
+            scores[self._groups != gid] = -1.0
+            hits = np.flatnonzero(scores >= self.threshold)
+            for slot in hits[np.argsort(-scores[hits])]:
+                entry_guard, cache_key, original, entry_words = self._entries[slot]
+                # same numbers, and neither topic narrower than the other
+                if entry_guard == guard and covers(words, entry_words) and covers(entry_words, words):
+                    self._clock += 1
+                    self._used[slot] = self._clock
+                    return cache_key, original, float(scores[slot])
+            return None
+
+    def discard(self, cache_key):
+        with self._lock:
+            slot = self._slots.pop(cache_key, None)
+            if slot is not None:
+                self._entries[slot] = None
+                self._groups[slot] = -1
+                self._used[slot] = 0
+
+    def __len__(self):
+        return len(self._slots)
@@ -5,10 +5,20 @@ import uuid
 from datetime import date, timedelta
 import time
 import hashlib
-from openai import OpenAI
+from functools import partial
 from modules.languages import translations
-from modules.db_operations import record_generation, can_generate_lesson, can_generate_guest, safe_json_load
+from modules.db_operations import record_generation, can_generate_lesson, can_generate_guest, remaining_lessons, remaining_guest
 from modules.language_manager import LanguageManager
+from modules.method_catalog import MethodCatalog, fetch_method_detail, fetch_visible_methods, load_snapshot
+from modules.method_search import SearchIndex
+from modules.method_facets import FacetIndex
+from modules.method_ranges import RangeIndex
+from modules.methods_manipulation import catalog_planner_rows, plan_lesson
+from modules.response_cache import ResponseCache, response_key
+from modules.topic_index import TopicIndex, group_key
+from modules.generation_jobs import BATCH_CONCURRENCY, CHARGE_EACH, WORKERS, GenerationJobs, JobRunning, QueueFull
+from modules.llm_client import get_backend
+from modules.lesson_prompt import AI_MODEL, PROMPT_VERSION, build_prompt
 from streamlit_cookies_manager import EncryptedCookieManager
 #from streamlit_cookies_manager import CookieManager
 
@@ -43,6 +53,8 @@ key = st.secrets["supabase"]["key"]
 for k, v in {
     "ai_result": None,
     "ai_topic": None,
+    "ai_error": None,
+    "ai_batch_results": [],
 }.items():
     st.session_state.setdefault(k, v)
     
@@ -596,65 +608,44 @@ if st.session_state.user and profile:
 # ENTITLEMENT & ROTATION
 # ==================================================
 
-@st.cache_data(ttl=300)
-def load_visible_methods(_supabase_client, tier: str, lang: str):
-    if _supabase_client is None:
-        raise RuntimeError("Supabase client is None in load_visible_methods")
-    
-    today = date.today().isoformat()
-
-    ids = [
-        r["method_id"]
-        for r in _supabase_client.table("method_visibility")
-        .select("method_id")
-        .eq("tier", tier)
-        .lte("valid_from", today)
-        .gte("valid_to", today)
-        .execute()
-        .data
-    ]
-
-    if not ids:
-        return []
-
-    res = (
-        _supabase_client.table("methods")
-        .select("*")
-        .eq("language_code", lang)
-        .in_("id", ids)
-        .execute()
-        .data
+@st.cache_resource
+def get_method_catalog():
+    """One catalog per process, shared by every session."""
+    client = create_client(url, key)
+    return MethodCatalog(
+        lambda previous: load_snapshot(client, previous),
+        # cold start: one RPC per (tier, lang) while the snapshot loads
+        fallback=lambda tier, lang, day: fetch_visible_methods(client, tier, lang, day),
+        # steps/tips are only fetched for opened or selected methods
+        detail_loader=lambda m_id, code: fetch_method_detail(client, m_id, code),
     )
 
-    if not res and lang != "en":
-        res = (
-            _supabase_client.table("methods")
-            .select("*")
-            .eq("language_code", "en")
-            .in_("id", ids)
-            .execute()
-            .data
-        )
-
-    # parse JSON once
+@st.cache_resource
+def get_response_cache():
+    """Generated lessons shared by every session and kept across restarts."""
+    return ResponseCache(os.getenv("AI_CACHE_PATH", ".cache/ai_responses.sqlite"))
 
+@st.cache_resource
+def get_topic_index():
+    """Near-duplicate topics ("photosynthesis in plants" ~ "Photosynthesis") of cached lessons."""
+    return TopicIndex()
 
-    return res
+@st.cache_resource
+def get_generation_jobs():
+    """Worker pool running AI generations off the script thread."""
+    # identical concurrent generations share one call; AI_COALESCED_CHARGE=first
+    # charges only the requester who started it
+    # AI_WORKERS caps concurrent upstream calls per process
+    return GenerationJobs(
+        workers=int(os.getenv("AI_WORKERS", WORKERS)),
+        charge=os.getenv("AI_COALESCED_CHARGE", CHARGE_EACH),
+    )
 
-supabase_client = ensure_supabase_client()
-methods = load_visible_methods(supabase_client, tier, lang)
-parsed_methods = []
+def load_visible_methods(tier: str, lang: str):
+    return get_method_catalog().visible_methods(tier, lang)
 
-for m in methods:
-    parsed = {
-        **m,  # shallow copy
-        "_parsed": {
-        "before": safe_json_load(m.get("before")),
-        "after": safe_json_load(m.get("after")),
-        "content": safe_json_load(m.get("content_md")),
-        "tools": safe_json_load(m.get("tools")),
-    }}
-    parsed_methods.append(parsed)
+# Lightweight list records; steps/tips load per opened card (method_detail)
+methods = load_visible_methods(tier, lang)
 
 # ==================================================
 # UI LOGOUT
@@ -712,38 +703,158 @@ if not st.session_state.user:
     st.sidebar.error(f"✨ {msg3}\n✨ {msg1}\n✨ {msg2}")
       
 
-filtered_methods = parsed_methods[:number_of_methods_to_show]
-method_names = [m["name"] for m in filtered_methods if "id" in m]
+entitled_methods = methods[:number_of_methods_to_show]
+
+# --------------------------------------------------
+# --- Search + facets (in-memory, no Supabase query) ---
+# --------------------------------------------------
+catalog = get_method_catalog()
+search_query = st.sidebar.text_input(f"🔎 {tr('search_methods')}", key="method_search")
+max_minutes = st.sidebar.number_input(
+    f"⏱️ {tr('fits_in_minutes')}", min_value=0, max_value=240, step=5, key="filter-minutes"
+)
+pupil_age = st.sidebar.number_input(
+    f"🎒 {tr('pupil_age')}", min_value=0, max_value=99, step=1, key="filter-age"
+)
+
+FACET_LABELS = {
+    "level": tr("level"),
+    "time": tr("time"),
+    "materials": tr("materials"),
+    "tags": tr("tags"),
+}
+facets = catalog.view_index("facets", tier, lang, FacetIndex)
+
+# read every facet first: each facet's counts depend on the others' choices.
+# Selections made in another language, tier or day may name values this view
+# lacks (and a facet without values has no widget to clear them), so prune them.
+selected_facets = facets.known(
+    {f: st.session_state.get(f"facet-{f}", []) for f in FACET_LABELS}
+)
+for f, chosen in selected_facets.items():
+    if st.session_state.get(f"facet-{f}", []) != chosen:
+        st.session_state[f"facet-{f}"] = chosen
+
+filter_state = (
+    search_query, max_minutes, pupil_age,
+    tuple(tuple(v) for v in selected_facets.values()),
+)
+if st.session_state.get("last_method_filters", filter_state) != filter_state:
+    st.query_params["page"] = "1"
+st.session_state.last_method_filters = filter_state
+
+base = facets.first(len(entitled_methods))
+
+# 0 means "any"; ranges come pre-parsed from the catalog
+if max_minutes or pupil_age:
+    ranges = catalog.view_index("ranges", tier, lang, RangeIndex)
+    base &= ranges.mask(max_minutes or None, pupil_age or None)
+
+ranked = None
+if search_query.strip():
+    index = catalog.view_index("search", tier, lang, lambda ms: SearchIndex(ms, lang))
+    ranked = index.search(search_query)
+    base &= facets.of(ranked)
+
+st.sidebar.markdown(f"**{tr('filters')}**")
+for facet, label in FACET_LABELS.items():
+    if not facets.values[facet]:
+        continue
+    counts = facets.counts(facet, selected_facets, base)
+    st.sidebar.multiselect(
+        label,
+        facets.values[facet],
+        key=f"facet-{facet}",
+        format_func=lambda v, counts=counts: f"{v} ({counts.get(v, 0)})",
+    )
+
+filtered_methods = facets.select(facets.mask(selected_facets, base), ranked)
+if not filtered_methods and (
+    ranked is not None or max_minutes or pupil_age or any(selected_facets.values())
+):
+    st.info(tr("no_methods_found"))
 
 method_qs = st.query_params.get("method", None)
 method_qs = method_qs[0] if isinstance(method_qs, list) else method_qs
 
+# --------------------------------------------------
+# --- Pagination (state lives in the URL) ---
+# --------------------------------------------------
+PAGE_SIZES = [10, 20, 50]
+
+def query_int(name, default, min_value=None, max_value=None):
+    """An int query param, clamped to the bounds of the widget it feeds."""
+    value = st.query_params.get(name)
+    value = value[0] if isinstance(value, list) else value
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    if min_value is not None:
+        value = max(value, min_value)
+    if max_value is not None:
+        value = min(value, max_value)
+    return value
+
+page_size = query_int("page_size", PAGE_SIZES[0])
+if page_size not in PAGE_SIZES:
+    page_size = PAGE_SIZES[0]
+
+page_count = max(1, -(-len(filtered_methods) // page_size))
+page = query_int("page", 1)
+
+# A shared ?method= link opens on the page that holds the method
+if method_qs:
+    pos = next((i for i, m in enumerate(filtered_methods) if str(m.id) == method_qs), None)
+    if pos is not None:
+        page = pos // page_size + 1
+
+page = min(max(page, 1), page_count)
+page_methods = filtered_methods[(page - 1) * page_size : page * page_size]
+
+def render_pager(position):
+    if page_count == 1 and len(filtered_methods) <= PAGE_SIZES[0]:
+        return
+
+    cols = st.columns([1, 2, 1, 2])
+    if cols[0].button("◀", key=f"page-prev-{position}", disabled=page <= 1):
+        st.query_params["page"] = str(page - 1)
+        st.query_params.pop("method", None)
+        st.rerun()
+
+    cols[1].markdown(tr("page_of").format(page=page, pages=page_count))
+
+    if cols[2].button("▶", key=f"page-next-{position}", disabled=page >= page_count):
+        st.query_params["page"] = str(page + 1)
+        st.query_params.pop("method", None)
+        st.rerun()
+
+    if position == "bottom":
+        new_size = cols[3].selectbox(
+            tr("methods_per_page"), PAGE_SIZES,
+            index=PAGE_SIZES.index(page_size), key="page-size",
+        )
+        if new_size != page_size:
+            st.query_params["page_size"] = str(new_size)
+            st.query_params["page"] = "1"
+            st.rerun()
+
 # Auto-collapse About when a method is opened
 #if method_qs:
 #    st.session_state.about_mode = None
 # --------------------------------------------------            
-# --- Render ---
+# --- Render (current page only) ---
 # --------------------------------------------------
-for m in filtered_methods:
+render_pager("top")
 
-    m_id = str(m.get("id"))
-    opened = (m_id == method_qs)
+for m in page_methods:
 
-    # Get translated fields with fallback
-    name = m.get(f"name_{lang}") or m.get("name") or tr("unnamed_method")
-    description = m.get(f"description{lang}") or m.get("description")
-    tips = m.get(f"tips_{lang}") or m.get("tips")
+    m_id = str(m.id)
+    opened = (m_id == method_qs)
 
-    before = safe_json_load(m["before"])
-    after = safe_json_load(m["after"])
-    content = safe_json_load(m["content_md"])
-    
-    # ---- Parsed JSON (single source of truth) ----
-    parsed = m.get("_parsed", {})
-    before = parsed.get("before") or []
-    after = parsed.get("after") or []
-    content = parsed.get("content") or []
-    tools = parsed.get("tools") or []
+    name = m.name or tr("unnamed_method")
+    description = m.description
+    tools = m.materials
 
     with st.container(border=True):
         cols = st.columns([0.7, 0.3])
@@ -751,20 +862,20 @@ for m in filtered_methods:
         # ================= LEFT =================
         with cols[0]:
             st.subheader(name)
+            if m.is_fallback:
+                st.caption(f"🇬🇧 {tr('fallback_language_note')}")
             if description:
                 st.write(description)
         
             meta = []
-            if m.get("age_group"):
-                vals = safe_json_load(m["age_group"])
-                if vals:
-                    meta.append(f"**{tr("level")}:** " + ", ".join(map(str, vals)))
+            if m.age_group:
+                meta.append(f"**{tr("level")}:** " + ", ".join(m.age_group))
 
-            if m.get("tags"):
-                        meta.append(str(m["tags"]))
+            if m.tags:
+                meta.append(", ".join(m.tags))
 
-            if m.get("time"):
-                meta.append(f"**{tr('time')}:** {m['time']}")
+            if m.time:
+                meta.append(f"**{tr('time')}:** {m.time}")
 
             if tools:
                 meta.append(f"**{tr("materials")}:** " + ", ".join(map(str, tools)))
@@ -779,32 +890,37 @@ for m in filtered_methods:
                 key=f"btn-{m_id}"
             ):
                 if opened:
-                    st.query_params.clear()
+                    # keep lang/anon_id/page in the URL
+                    st.query_params.pop("method", None)
                 else:
                     st.query_params["method"] = m_id
+                    st.query_params["page"] = str(page)
 
                 st.rerun()
                 
         if opened:
+            m = get_method_catalog().method_detail(m)
+            tips = m.tips
+
             # ---------- MAIN CONTENT ----------
             def render_steps(title, steps):
                 if not steps:
                     return
                 st.markdown(f"##### {title}")
-                for step in sorted(steps, key=lambda x: x.get("order", 0)):
+                for step in steps:
                     mins = (
-                        f" — {step['minutes']} min"
-                        if step.get("minutes")
+                        f" — {step.durationMin} min"
+                        if step.durationMin
                         else ""
                     )
                     st.markdown(
-                        f"- **{step.get('title','')}**{mins}  \n"
-                        f"{step.get('activity','')}"
+                        f"- **{step.title}**{mins}  \n"
+                        f"{step.description}"
                     )
 
-            render_steps(tr("main_method"), content)
-            render_steps(tr("before"), before)
-            render_steps(tr("after"), after)
+            render_steps(tr("main_method"), m.steps)
+            render_steps(tr("before"), m.before)
+            render_steps(tr("after"), m.after)
 
             # ---------- TOOLS ----------
             if tools:
@@ -814,15 +930,65 @@ for m in filtered_methods:
 
             # ---------- TIPS ----------
             if tips:
-                tips_list = json.loads(tips) if isinstance(tips, str) else tips
                 st.markdown(f"**{tr('tips')}**")
-                for tip in tips_list:
+                for tip in tips:
                     st.markdown(f"- {tip}")
 
             # ---------- VIDEO ----------
             #if m.get("videoUrl"):
             #    st.video(m["videoUrl"])
 
+render_pager("bottom")
+
+# ==================================================
+# LESSON PLANNER (shareable via ?plan_min=&plan_seed=)
+# ==================================================
+LESSON_BLOCKS = {1: 20, 2: 60, 3: 20}  # % of the lesson per block
+PLAN_MINUTES = (10, 180)
+
+with st.expander(f"🗓️ {tr('lesson_planner')}", expanded="plan_seed" in st.query_params):
+    # a shared URL may carry any value; number_input rejects out-of-range ones
+    plan_minutes = st.number_input(
+        tr("lesson_minutes"), min_value=PLAN_MINUTES[0], max_value=PLAN_MINUTES[1], step=5,
+        value=query_int("plan_min", 45, *PLAN_MINUTES),
+    )
+    plan_seed = query_int("plan_seed", None)
+
+    cols = st.columns(2)
+    if cols[0].button(tr("plan_lesson"), key="plan-lesson") or (
+        plan_seed is not None and cols[1].button(tr("another_plan"), key="plan-again")
+    ):
+        st.query_params["plan_min"] = str(plan_minutes)
+        st.query_params["plan_age"] = str(pupil_age)
+        st.query_params["plan_seed"] = str(uuid.uuid4().int % 1_000_000)
+        st.rerun()
+
+    if plan_seed is not None:
+        plan_age = query_int("plan_age", 0, 0, 99)
+        planner_methods = [
+            m for m in entitled_methods
+            if not plan_age or m.age_min is None or m.age_min <= plan_age <= m.age_max
+        ]
+        lesson = plan_lesson(
+            catalog_planner_rows(planner_methods),
+            plan_minutes, LESSON_BLOCKS, plan_seed,
+            catalog_version=catalog.version(),
+            # visibility windows change by day, the catalog version does not
+            filters={
+                "tier": tier, "lang": lang, "day": date.today().isoformat(),
+                "quota": len(entitled_methods), "age": plan_age,
+            },
+        )
+
+        if not lesson:
+            st.info(tr("no_plan_possible"))
+        else:
+            st.caption(tr("planned_minutes").format(
+                used=sum(row[3] for row in lesson), total=plan_minutes
+            ))
+            for row in lesson:
+                st.markdown(f"- **{tr(f'block_{row[5]}')}** · {row[1]} — {row[3]} min")
+
 # ==================================================
 # AI GENERATION
 # ==================================================
@@ -834,9 +1000,92 @@ def rate_limit(key, seconds):
     st.session_state[key] = now
     return True
 
+JOB_POLL = 0.5       # seconds between checks on a running generation
+BATCH_MAX_TOPICS = BATCH_CONCURRENCY  # a whole batch runs at once
+
+def record_ai_usage(count=1):
+    """Charge `count` AI generations to the logged-in profile or the guest session."""
+    if st.session_state.user:
+        updated_profile = load_profile(st.session_state.user["id"])
+        for _ in range(count):
+            updated_profile = record_generation(updated_profile)
+        #st.write(updated_profile)
+
+        try:
+            ensure_supabase_client().table("profiles").update(updated_profile).eq(
+                "id", st.session_state.user["id"]
+            ).execute()
+        except Exception as e:
+            st.error(f"{tr('update?error!!!!!!!')}: {e}")
+    else:
+        load_guest_session.clear()
+        # Always pull the latest data to avoid stale cached values
+        resp = ensure_supabase_client().table("guest_sessions") \
+            .select("*").eq("anon_id", anon_id).single().execute()
+        guest_data = resp.data or {}
+
+        # Safely handle missing or null fields
+        lessons_generated = (guest_data.get("lessons_generated") or 0) + count
+        ai_used_week = (guest_data.get("ai_used_week") or 0) + count
+        ai_used_month = (guest_data.get("ai_used_month") or 0) + count
+
+        # Optionally keep week/month start fields consistent
+        week_start = guest_data.get("week_start") or date.today().isoformat()
+        month_start = guest_data.get("month_start") or date.today().replace(day=1).isoformat()
+
+        update_data = {
+            "lessons_generated": lessons_generated,
+            "ai_used_week": ai_used_week,
+            "ai_used_month": ai_used_month,
+            "last_generated_at": "now()",
+            "week_start": week_start,
+            "month_start": month_start,
+        }
+
+        result = ensure_supabase_client().table("guest_sessions") \
+            .update(update_data).eq("anon_id", anon_id).execute()
+
+        #st.write("✅ Update result:", result.data)
+        #st.write("Before update:", guest_data)
+        #st.write("Sending update:", update_data)
+
+def openai_api_key():
+    return (
+        st.secrets["open_AI"]["OPENAI_API_KEY"]
+        or os.getenv("OPENAI_API_KEY"))
+
+def stream_lesson(job, backend, prompt, cache_key, cache, topic, lang, topics, group):
+    """Runs on a generation worker (no Streamlit calls): streams the answer into `job`."""
+    messages = [{"role": "user", "content": prompt.prompt}]
+    for delta in backend.stream(messages, model=AI_MODEL, max_tokens=prompt.max_tokens):
+        job.append(delta)
+    cache.put(cache_key, job.text, topic, lang, PROMPT_VERSION)
+    topics.add(group, topic, cache_key)
+
+def cached_lesson(topic, cache_key, group):
+    """
+    (text, None) for an exact cache hit, (text, earlier topic) for a
+    near-duplicate topic with the same methods, else (None, None).
+    """
+    text = get_response_cache().get(cache_key)
+    if text is not None:
+        # lessons cached before a restart join the index as they are used
+        get_topic_index().add(group, topic, cache_key)
+        return text, None
+    similar = get_topic_index().lookup(group, topic)
+    if similar:
+        text = get_response_cache().get(similar[0])
+        if text is not None:
+            return text, similar[1]
+        get_topic_index().discard(similar[0])
+    return None, None
+
 st.markdown("---")
 st.subheader(f"✨ {tr('generate_AI_subheader')}")
 
+# generations are tracked per user (or per guest browser)
+ai_owner = st.session_state.user["id"] if st.session_state.user else anon_id
+
 # can_generate=function in db_operations.py, 
 # it compares quotas from profile table with used-up
 if st.session_state.user: 
@@ -844,9 +1093,11 @@ if st.session_state.user:
         "name", profile["plan"]
     ).single().execute().data
     can_generate, msg = can_generate_lesson(profile, plan)
+    remaining = remaining_lessons(profile, plan)
 else:
     guest = ensure_guest_session(anon_id)
     can_generate, msg = can_generate_guest(guest)
+    remaining = remaining_guest(guest)
 
     if msg:
         msg = tr("guest_limit_reached")
@@ -855,7 +1106,14 @@ else:
 
 topic = st.text_input(tr("enter_topic"))    
 
-method_options = {m["name"]: m["id"] for m in filtered_methods}
+# name -> id and id -> method over the entitled methods, built once per catalog view
+method_options, methods_by_id = catalog.view_index(
+    ("ai_methods", number_of_methods_to_show), tier, lang,
+    lambda view: (
+        {m.name: m.id for m in view[:number_of_methods_to_show]},
+        {m.id: m for m in view[:number_of_methods_to_show]},
+    ),
+)
 
 selected_names = st.multiselect(
     f"{tr('Choose_methods_for_AI')}:",
@@ -869,42 +1127,36 @@ if len(selected_names) >= 2:
 selected_methods = [method_options[name] for name in selected_names]
 
 methods_steps = []
+step_counts = []  # sizes the requested answer and max_tokens
 
 if selected_names:
     for method_id in selected_methods:
-        # Find the method dict that matches the selected ID
-        method_data = next((m for m in filtered_methods if m["id"] == method_id), None)
-
+        method_data = methods_by_id.get(method_id)
         if not method_data:
             continue
 
-        # Load the content_md JSON (list of steps)
-        content = safe_json_load(method_data.get("content_md"))
+        # "name — ordered steps", formatted once per method and prompt version
+        methods_steps.append(catalog.prompt_fragment(method_data))
+        step_counts.append(len(catalog.method_detail(method_data).steps or ()))
 
-        # Convert the list of step dicts to readable strings
-        if isinstance(content, list):
-            content_sorted = sorted(
-                content, key=lambda s: s.get("order", 0)
-            )
-            steps_text = "\n".join(
-                f"{s.get('order', i+1)}. {s.get('title', '')}: {s.get('activity', '')}"
-                for i, s in enumerate(content_sorted)
-                if isinstance(s, dict)
-            )
-        else:
-            steps_text = str(content)
-
-        # Append a formatted version for later use in the prompt
-        methods_steps.append(f"{method_data.get('name', method_names)} — {steps_text}")
+    # Local estimate of what the call will cost (no API request)
+    estimate = build_prompt(topic or "…", methods_steps, lang, step_counts)
+    st.caption(tr("ai_estimate").format(
+        tokens=estimate.input_tokens, max_tokens=estimate.max_tokens, cost=estimate.cost or 0
+    ))
+    if estimate.trimmed:
+        st.caption(tr("ai_steps_trimmed"))
 
     # Optional: preview in Streamlit
     #st.markdown(f"### 🧩 {tr('selected_methods')}")
     #for ms in selected_methods:
     #    st.markdown(f"- {ms}")
-    if st.button(tr("generate_button")):
-        if not topic:
-            st.warning(tr("enter_topic_first"))
-        elif not can_generate:
+    topic_group = group_key(selected_methods, lang, PROMPT_VERSION, AI_MODEL)
+    cache_key = response_key(selected_methods, topic, lang, PROMPT_VERSION, AI_MODEL)
+
+    def start_generation():
+        """Quota checks, then a background job for `topic` (never served from the cache)."""
+        if not can_generate:
             st.error(tr("cannot_generate_now"))
             st.stop()
         elif not rate_limit("ai_rate", 30):
@@ -912,89 +1164,199 @@ if selected_names:
             st.stop()
 
         else:
-            api_key = (
-                st.secrets["open_AI"]["OPENAI_API_KEY"]
-                or os.getenv("OPENAI_API_KEY"))
+            api_key = openai_api_key()
 
             if not api_key:
                 st.error(f"❌ {tr('no_api_key')}")
             else:
-                client = OpenAI(api_key=api_key)
-                MODEL = "gpt-4o-mini"
-
-            with st.spinner(tr("generating_lesson")):
-                #prompt = f"""
-                #Just say "Hi" back. it is for test.
-                #"""
-                prompt = f"""
-                You are an expert instructional designer. 
-                Adapt the following teaching methods to re-create lesson outlines tailored for the topic "{topic}".
-                
-                Methods and their ordered steps:
-                {chr(10).join(methods_steps)}
-                            
-                For each method, provide:
-                - A concise adapted title
-                - One clear learning objective
-                - Ordered step-by-step instructions
-                - One before-activity and one after-activity
-                Keep total under 280 words. Use {lang} language, unless the topic "{topic}" in another language (then use that language).
-                """
+                prompt = build_prompt(topic, methods_steps, lang, step_counts)
                 try:
-                    resp = client.chat.completions.create(
-                        model=MODEL,
-                        messages=[{"role": "user", "content": prompt}],
-                        max_tokens=580,
+                    # The page polls the job; the quota is charged once it completes
+                    job = get_generation_jobs().submit(
+                        ai_owner,
+                        partial(
+                            stream_lesson,
+                            # shared client: connections stay warm between generations
+                            backend=get_backend(api_key),
+                            prompt=prompt,
+                            cache_key=cache_key,
+                            cache=get_response_cache(),
+                            topics=get_topic_index(),
+                            group=topic_group,
+                            topic=topic,
+                            lang=lang,
+                        ),
+                        key=cache_key,
+                        topic=topic,
                     )
-                    st.session_state.ai_result = resp.choices[0].message.content
-                    st.session_state.ai_topic = topic
-                    
-                    if st.session_state.user:
-                        fresh_profile = load_profile_uncached(st.session_state.user["id"])
-                        updated_profile = record_generation(fresh_profile)
-                        #st.write(updated_profile)
-
-                        try:
-                            ensure_supabase_client().table("profiles").update(updated_profile).eq(
-                                "id", st.session_state.user["id"]
-                            ).execute()
-                        except Exception as e:
-                            st.error(f"{tr('update?error!!!!!!!')}: {e}")
-                    else:
-                        load_guest_session.clear()
-                        # Always pull the latest data to avoid stale cached values
-                        resp = ensure_supabase_client().table("guest_sessions") \
-                            .select("*").eq("anon_id", anon_id).single().execute()
-                        guest_data = resp.data or {}
-
-                        # Safely handle missing or null fields
-                        lessons_generated = (guest_data.get("lessons_generated") or 0) + 1
-                        ai_used_week = (guest_data.get("ai_used_week") or 0) + 1
-                        ai_used_month = (guest_data.get("ai_used_month") or 0) + 1
-
-                        # Optionally keep week/month start fields consistent
-                        week_start = guest_data.get("week_start") or date.today().isoformat()
-                        month_start = guest_data.get("month_start") or date.today().replace(day=1).isoformat()
-
-                        update_data = {
-                            "lessons_generated": lessons_generated,
-                            "ai_used_week": ai_used_week,
-                            "ai_used_month": ai_used_month,
-                            "last_generated_at": "now()",
-                            "week_start": week_start,
-                            "month_start": month_start,
-                        }
-
-                        result = ensure_supabase_client().table("guest_sessions") \
-                            .update(update_data).eq("anon_id", anon_id).execute()
-
-                        #st.write("✅ Update result:", result.data)
-                        #st.write("Before update:", guest_data)
-                        #st.write("Sending update:", update_data)
-
-                except Exception as e:
-                    st.error(f"{tr('api_error!!!!!!!')}: {e}")
-                    
+                    st.session_state.ai_job = job.id
+                except JobRunning as exc:
+                    # keep following the running job; the new request is not queued
+                    st.session_state.ai_job = exc.job.id
+                    st.warning(tr("generation_running").format(topic=exc.job.meta.get("topic", "")))
+                except QueueFull:
+                    st.warning(tr("generation_busy"))
+
+    if st.button(tr("generate_button")):
+        cached, similar_topic = cached_lesson(topic, cache_key, topic_group) if topic else (None, None)
+        st.session_state.ai_reused_for = None
+
+        if not topic:
+            st.warning(tr("enter_topic_first"))
+        elif cached is not None:
+            # same methods + (nearly) the same topic were generated before: free
+            st.session_state.ai_result = cached
+            st.session_state.ai_topic = similar_topic or topic
+            if similar_topic:
+                st.info(tr("similar_topic_reused").format(topic=similar_topic))
+                st.session_state.ai_reused_for = (topic, cache_key)
+        else:
+            start_generation()
+
+    # A similar topic's lesson was reused: the exact topic can still be
+    # generated, charged like any other generation
+    if topic and st.session_state.get("ai_reused_for") == (topic, cache_key):
+        if st.button(tr("generate_fresh_button")):
+            st.session_state.ai_reused_for = None
+            start_generation()
+
+    # ---------- BATCH: the same methods for a whole unit of topics ----------
+    with st.expander(f"📚 {tr('batch_generation')}"):
+        batch_topics = st.text_area(tr("batch_topics"), key="batch-topics")
+
+        if st.button(tr("generate_batch_button")):
+            topics = list(dict.fromkeys(
+                t.strip() for t in batch_topics.splitlines() if t.strip()
+            ))[:BATCH_MAX_TOPICS]
+
+            # cached topics are shown at once and cost nothing
+            results, missing = [], []
+            for t in topics:
+                t_key = response_key(selected_methods, t, lang, PROMPT_VERSION, AI_MODEL)
+                t_cached, _ = cached_lesson(t, t_key, topic_group)
+                if t_cached is not None:
+                    results.append((t, t_cached))
+                else:
+                    missing.append((t, t_key))
+            st.session_state.ai_batch_results = results
+
+            api_key = openai_api_key() if missing else None
+            if not topics:
+                st.warning(tr("enter_topic_first"))
+            elif not missing:
+                pass
+            elif not can_generate or remaining == 0:
+                st.error(tr("cannot_generate_now"))
+            elif not rate_limit("ai_rate", 30):
+                st.warning(tr("slow_down"))
+            elif not api_key:
+                st.error(f"❌ {tr('no_api_key')}")
+            else:
+                # quota is charged per topic, so never start more than is left
+                if remaining is not None and len(missing) > remaining:
+                    st.warning(tr("batch_quota_trimmed").format(n=remaining))
+                    missing = missing[:remaining]
+
+                backend = get_backend(api_key)
+                items = [
+                    (
+                        partial(
+                            stream_lesson,
+                            backend=backend,
+                            prompt=build_prompt(t, methods_steps, lang, step_counts),
+                            cache_key=t_key,
+                            cache=get_response_cache(),
+                            topics=get_topic_index(),
+                            group=topic_group,
+                            topic=t,
+                            lang=lang,
+                        ),
+                        t_key,
+                        {"topic": t},
+                    )
+                    for t, t_key in missing
+                ]
+                try:
+                    batch = get_generation_jobs().submit_batch(
+                        ai_owner,
+                        items,
+                        concurrency=int(os.getenv("AI_BATCH_CONCURRENCY", BATCH_CONCURRENCY)),
+                    )
+                    st.session_state.ai_batch = batch.id
+                except QueueFull:
+                    st.warning(tr("generation_busy"))
+
+if "ai_job" not in st.session_state:
+    # pick up a generation started before a page switch or reload
+    job = get_generation_jobs().latest(ai_owner)
+    st.session_state.ai_job = job.id if job and not job.claimed_by(ai_owner) else None
+
+@st.fragment(run_every=JOB_POLL)
+def show_generation_job():
+    job = get_generation_jobs().get(st.session_state.ai_job)
+    if job is not None and job.active:
+        st.caption(f"⏳ {tr('generating_lesson')}")
+        if job.text:
+            st.markdown(job.text + "▌")
+        return
+
+    st.session_state.ai_job = None
+    if job is not None and job.status == "failed":
+        st.session_state.ai_error = job.error
+    elif job is not None and job.claim(ai_owner):
+        if job.charges(ai_owner):
+            record_ai_usage()
+        st.session_state.ai_result = job.text
+        st.session_state.ai_topic = job.meta.get("topic")
+    st.rerun()
+
+if st.session_state.ai_job:
+    show_generation_job()
+
+if "ai_batch" not in st.session_state:
+    batch = get_generation_jobs().latest_batch(ai_owner)
+    st.session_state.ai_batch = (
+        batch.id if batch and not all(job.claimed_by(ai_owner) for job in batch.jobs) else None
+    )
+
+@st.fragment(run_every=JOB_POLL)
+def show_generation_batch():
+    batch = get_generation_jobs().get_batch(st.session_state.ai_batch)
+    if batch is None:
+        st.session_state.ai_batch = None
+        st.rerun()
+
+    # each topic is shown and charged as soon as it completes
+    charged = 0
+    for job in batch.jobs:
+        if job.claim(ai_owner):
+            charged += job.charges(ai_owner)
+            st.session_state.ai_batch_results.append((job.meta.get("topic"), job.text))
+    if charged:
+        record_ai_usage(charged)
+
+    if batch.active:
+        st.progress(
+            batch.finished / len(batch.jobs),
+            text=tr("batch_progress").format(done=batch.finished, total=len(batch.jobs)),
+        )
+        for job in batch.jobs:
+            icon = {"done": "✅", "failed": "❌"}.get(job.status, "⏳")
+            st.caption(f"{icon} {job.meta.get('topic')}")
+        return
+
+    st.session_state.ai_batch = None
+    failed = [job for job in batch.jobs if job.status == "failed"]
+    if failed:
+        st.session_state.ai_error = "; ".join(f"{job.meta.get('topic')}: {job.error}" for job in failed)
+    st.rerun()
+
+if st.session_state.ai_batch:
+    show_generation_batch()
+
+if st.session_state.ai_error:
+    st.error(f"{tr('api_error!!!!!!!')}: {st.session_state.ai_error}")
+    st.session_state.ai_error = None
 
 if st.session_state.ai_result:
     st.markdown("---")
@@ -1004,6 +1366,10 @@ if st.session_state.ai_result:
 
     st.markdown(st.session_state.ai_result)
 
+for batch_topic, batch_text in st.session_state.ai_batch_results:
+    with st.expander(f"🧠 {batch_topic}"):
+        st.markdown(batch_text)
+
 # ==================================================
 # PERIOD RESET (moved here to avoid overwriting AI counters)
 # ==================================================
@@ -0,0 +1,90 @@
+-- Change tracking for the incremental catalog sync in modules/method_catalog.py.
+--
+-- Every methods / method_visibility row carries an updated_at stamp, and
+-- deletes leave a tombstone in catalog_deletions. The app asks only for
+-- rows stamped after its last watermark (minus a short overlap), so an
+-- unchanged catalog costs three (nearly) empty responses per refresh.
+
+alter table public.methods
+    add column if not exists updated_at timestamptz not null default now();
+alter table public.method_visibility
+    add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists methods_updated_at_idx
+    on public.methods (updated_at);
+create index if not exists method_visibility_updated_at_idx
+    on public.method_visibility (updated_at);
+
+create or replace function public.touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists methods_touch on public.methods;
+create trigger methods_touch
+    before insert or update on public.methods
+    for each row execute function public.touch_updated_at();
+
+drop trigger if exists method_visibility_touch on public.method_visibility;
+create trigger method_visibility_touch
+    before insert or update on public.method_visibility
+    for each row execute function public.touch_updated_at();
+
+-- --------------------------------------------------
+-- Tombstones
+-- --------------------------------------------------
+create table if not exists public.catalog_deletions (
+    id            bigserial primary key,
+    table_name    text        not null,
+    method_id     text        not null,
+    language_code text,
+    deleted_at    timestamptz not null default now()
+);
+
+create index if not exists catalog_deletions_deleted_at_idx
+    on public.catalog_deletions (deleted_at);
+
+alter table public.catalog_deletions enable row level security;
+
+drop policy if exists catalog_deletions_read on public.catalog_deletions;
+create policy catalog_deletions_read on public.catalog_deletions
+    for select to anon, authenticated using (true);
+
+create or replace function public.log_method_deletion()
+returns trigger
+language plpgsql
+security definer
+as $$
+begin
+    insert into public.catalog_deletions (table_name, method_id, language_code)
+    values ('methods', old.id, old.language_code);
+    return old;
+end;
+$$;
+
+create or replace function public.log_visibility_deletion()
+returns trigger
+language plpgsql
+security definer
+as $$
+begin
+    insert into public.catalog_deletions (table_name, method_id)
+    values ('method_visibility', old.method_id);
+    return old;
+end;
+$$;
+
+drop trigger if exists methods_log_delete on public.methods;
+create trigger methods_log_delete
+    after delete on public.methods
+    for each row execute function public.log_method_deletion();
+
+drop trigger if exists method_visibility_log_delete on public.method_visibility;
+create trigger method_visibility_log_delete
+    after delete on public.method_visibility
+    for each row execute function public.log_visibility_deletion();
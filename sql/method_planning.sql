@@ -0,0 +1,6 @@
+-- Lesson block for the planner in modules/methods_manipulation.py
+-- (1 = lead-in, 2 = main activity, 3 = consolidation). Methods without a
+-- block are shown in the catalog but skipped by the planner.
+
+alter table public.methods
+    add column if not exists block smallint;
@@ -0,0 +1,43 @@
+-- Step titles/activities flattened into one text column, so the catalog's
+-- in-memory search index (modules/method_search.py) can cover steps while
+-- the list projection still skips the heavy content_md JSON.
+
+alter table public.methods
+    add column if not exists step_text text not null default '';
+
+create or replace function public.methods_step_text(content text)
+returns text
+language plpgsql
+immutable
+as $$
+begin
+    return coalesce((
+        select string_agg(
+            concat_ws(' ', step ->> 'title', step ->> 'activity'), ' '
+        )
+        from jsonb_array_elements(content::jsonb) as step
+        where jsonb_typeof(step) = 'object'
+    ), '');
+exception when others then
+    -- content_md that is not a JSON array of steps
+    return coalesce(content, '');
+end;
+$$;
+
+create or replace function public.methods_fill_step_text()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.step_text := public.methods_step_text(new.content_md::text);
+    return new;
+end;
+$$;
+
+drop trigger if exists methods_step_text on public.methods;
+create trigger methods_step_text
+    before insert or update of content_md on public.methods
+    for each row execute function public.methods_fill_step_text();
+
+-- backfill (also bumps updated_at, so running apps pick it up on next sync)
+update public.methods set step_text = public.methods_step_text(content_md::text);
@@ -0,0 +1,28 @@
+-- Visible methods for a tier on a given day in a single round trip.
+-- Returns one row per method id: the requested language when it exists,
+-- otherwise the English row. Runs as the caller, so RLS still applies.
+--
+-- Called from modules/method_catalog.py:
+--   client.rpc("visible_methods", {"p_tier": ..., "p_lang": ..., "p_day": ...})
+-- modules/local_postgrest.py mirrors this function for offline use.
+
+create or replace function public.visible_methods(
+    p_tier text,
+    p_lang text,
+    p_day  date default current_date
+)
+returns setof public.methods
+language sql
+stable
+as $$
+    select distinct on (m.id) m.*
+    from public.method_visibility v
+    join public.methods m on m.id = v.method_id
+    where v.tier = p_tier
+      and v.valid_from <= p_day
+      and v.valid_to >= p_day
+      and m.language_code in (p_lang, 'en')
+    order by m.id, (m.language_code = p_lang) desc;
+$$;
+
+grant execute on function public.visible_methods(text, text, date) to anon, authenticated;
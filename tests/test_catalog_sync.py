@@ -0,0 +1,138 @@
+from modules.local_postgrest import LocalPostgrest
+from modules.method_catalog import MethodCatalog, fetch_method_detail, load_snapshot
+
+T0 = "2026-03-01T10:00:00+00:00"
+
+
+def row(method_id, code="en", stamp=T0, **fields):
+    return {
+        "id": method_id, "language_code": code, "name": f"Method {method_id}",
+        "time": "10 min", "updated_at": stamp,
+        "content_md": '[{"title": "Start", "activity": "old step", "order": 1}]',
+        "tips": '["old tip"]',
+        **fields,
+    }
+
+
+def visibility(method_id, stamp=T0):
+    return {
+        "method_id": method_id, "tier": "free", "updated_at": stamp,
+        "valid_from": "2026-01-01", "valid_to": "2026-12-31",
+    }
+
+
+def database(*rows):
+    return LocalPostgrest({
+        "methods": list(rows),
+        "method_visibility": [visibility(r["id"]) for r in rows],
+        "catalog_deletions": [],
+    })
+
+
+def catalog_over(db):
+    return MethodCatalog(
+        lambda previous: load_snapshot(db, previous),
+        detail_loader=lambda m_id, code: fetch_method_detail(db, m_id, code),
+    )
+
+
+def test_unchanged_catalog_keeps_its_snapshot():
+    db = database(row("a"), row("b"))
+    snap = load_snapshot(db)
+    assert load_snapshot(db, snap) is snap
+
+
+def test_watermark_advances_when_no_row_differs():
+    db = database(row("a"))
+    snap = load_snapshot(db)
+    snap.derived("probe", lambda: "built once")
+
+    # a tombstone for a row this replica never had changes nothing but the stamp
+    db.tables["catalog_deletions"].append({
+        "table_name": "methods", "method_id": "gone", "language_code": "en",
+        "deleted_at": "2026-03-01T12:00:00+00:00",
+    })
+    synced = load_snapshot(db, snap)
+
+    assert synced.watermark.isoformat() == "2026-03-01T12:00:00+00:00"
+    assert synced.methods[("a", "en")].name == "Method a"
+    # same rows: views built on the old snapshot carry over
+    assert synced.derived("probe", lambda: "rebuilt") == "built once"
+    # and the next sync starts from the new watermark
+    assert load_snapshot(db, synced) is synced
+
+
+def test_new_and_changed_rows_are_applied():
+    db = database(row("a"))
+    snap = load_snapshot(db)
+
+    db.tables["methods"][0].update(name="Renamed", updated_at="2026-03-01T10:05:00+00:00")
+    db.tables["methods"].append(row("b", stamp="2026-03-01T10:06:00+00:00"))
+    synced = load_snapshot(db, snap)
+
+    assert synced.methods[("a", "en")].name == "Renamed"
+    assert ("b", "en") in synced.methods
+
+
+def test_tombstone_removes_row_unless_recreated_later():
+    db = database(row("a"), row("b"))
+    snap = load_snapshot(db)
+
+    db.tables["methods"] = [r for r in db.tables["methods"] if r["id"] != "a"]
+    db.tables["catalog_deletions"] += [
+        {"table_name": "methods", "method_id": "a", "language_code": "en",
+         "deleted_at": "2026-03-01T10:05:00+00:00"},
+        {"table_name": "methods", "method_id": "b", "language_code": "en",
+         "deleted_at": "2026-03-01T10:05:00+00:00"},
+    ]
+    # b was deleted and re-created after its tombstone
+    db.tables["methods"][0]["updated_at"] = "2026-03-01T10:06:00+00:00"
+    synced = load_snapshot(db, snap)
+
+    assert ("a", "en") not in synced.methods
+    assert ("b", "en") in synced.methods
+
+
+def test_visibility_change_rereads_windows():
+    db = database(row("a"))
+    snap = load_snapshot(db)
+    assert [m.id for m in snap.visible("free", "en", "2026-03-01")] == ["a"]
+
+    db.tables["method_visibility"][0].update(
+        valid_to="2026-02-01", updated_at="2026-03-01T10:05:00+00:00"
+    )
+    synced = load_snapshot(db, snap)
+    assert synced.visible("free", "en", "2026-03-01") == ()
+
+
+def test_detail_only_edit_invalidates_details_and_fragments():
+    db = database(row("a"))
+    catalog = catalog_over(db)
+    method = catalog.snapshot().methods[("a", "en")]
+    assert catalog.method_detail(method).tips == ("old tip",)
+    assert "old step" in catalog.prompt_fragment(method)
+
+    db.tables["methods"][0].update(
+        tips='["new tip"]',
+        content_md='[{"title": "Start", "activity": "new step", "order": 1}]',
+        updated_at="2026-03-01T10:05:00+00:00",
+    )
+    catalog._refresh()
+    method = catalog.snapshot().methods[("a", "en")]
+
+    assert catalog.method_detail(method).tips == ("new tip",)
+    assert "new step" in catalog.prompt_fragment(method)
+    assert catalog.snapshot().watermark.isoformat() == "2026-03-01T10:05:00+00:00"
+
+
+def test_empty_catalog_falls_back_to_full_reload():
+    db = database()
+    snap = load_snapshot(db)
+    assert snap.watermark is None and not snap.methods
+
+    db.tables["methods"].append(row("a"))
+    db.tables["method_visibility"].append(visibility("a"))
+    reloaded = load_snapshot(db, snap)
+
+    assert ("a", "en") in reloaded.methods
+    assert reloaded.watermark.isoformat() == T0
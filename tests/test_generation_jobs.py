@@ -0,0 +1,38 @@
+import threading
+
+import pytest
+
+from modules.generation_jobs import GenerationJobs, JobRunning
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_owner_gets_running_job_back_only_for_the_same_request(release):
+    jobs = GenerationJobs(workers=2)
+    work = lambda job: release.wait(5)
+
+    first = jobs.submit("teacher", work, key="fractions", topic="Fractions")
+    assert jobs.submit("teacher", work, key="fractions", topic="Fractions") is first
+
+    with pytest.raises(JobRunning) as exc:
+        jobs.submit("teacher", work, key="photosynthesis", topic="Photosynthesis")
+    assert exc.value.job is first
+    assert jobs.latest("teacher") is first
+
+    release.set()
+    jobs._pool.shutdown(wait=True)
+    assert first.status == "done"
+
+
+def test_other_owners_join_a_running_key(release):
+    jobs = GenerationJobs(workers=2)
+    work = lambda job: release.wait(5)
+
+    first = jobs.submit("teacher", work, key="fractions")
+    assert jobs.submit("colleague", work, key="fractions") is first
+    assert first.owners == ["teacher", "colleague"]
@@ -0,0 +1,23 @@
+from modules.lesson_prompt import MAX_OUTPUT_WORDS, build_prompt, output_words
+
+
+def fragment(name, steps):
+    return f"{name} — " + "\n".join(f"{i}. Step {i}: do thing {i}" for i in range(1, steps + 1))
+
+
+def test_bigger_plan_gets_bigger_budget():
+    small = build_prompt("Volcanoes", [fragment("Jigsaw", 3)], "en", [3])
+    big = build_prompt("Volcanoes", [fragment("Jigsaw", 6), fragment("Bus Stops", 5)], "en", [6, 5])
+
+    assert big.words > small.words
+    assert big.max_tokens > small.max_tokens
+    assert f"under {big.words} words" in big.prompt
+
+
+def test_step_counts_default_to_fragment_lines():
+    steps = [fragment("Jigsaw", 4)]
+    assert build_prompt("Volcanoes", steps, "en").max_tokens == build_prompt("Volcanoes", steps, "en", [4]).max_tokens
+
+
+def test_answer_length_is_capped():
+    assert output_words([50] * 10) == MAX_OUTPUT_WORDS
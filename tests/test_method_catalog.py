@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from modules.local_postgrest import LocalPostgrest
+from modules.method_catalog import MethodCatalog, fetch_visible_methods, load_snapshot
+
+
+@pytest.fixture
+def db():
+    def method(method_id, code):
+        return {"id": method_id, "language_code": code, "name": f"{method_id}-{code}"}
+
+    return LocalPostgrest({
+        "methods": [
+            method("basic", "en"), method("basic", "cs"),
+            method("premium", "en"),
+            method("expired", "en"),
+            method("english_only", "en"),
+        ],
+        "method_visibility": [
+            {"method_id": "basic", "tier": "free", "valid_from": "2026-01-01", "valid_to": "2026-12-31"},
+            {"method_id": "english_only", "tier": "free", "valid_from": "2026-01-01", "valid_to": "2026-12-31"},
+            {"method_id": "premium", "tier": "pro", "valid_from": "2026-01-01", "valid_to": "2026-12-31"},
+            {"method_id": "expired", "tier": "free", "valid_from": "2025-01-01", "valid_to": "2025-12-31"},
+        ],
+    })
+
+
+def test_visible_methods_follow_tier_entitlement(db):
+    free = {m.id for m in fetch_visible_methods(db, "free", "en", "2026-03-01")}
+    pro = {m.id for m in fetch_visible_methods(db, "pro", "en", "2026-03-01")}
+    assert free == {"basic", "english_only"}
+    assert pro == {"premium"}
+
+
+@pytest.mark.parametrize("day, expected", [
+    ("2025-06-01", {"expired"}),
+    ("2025-12-31", {"expired"}),
+    ("2026-01-01", {"basic", "english_only"}),
+])
+def test_visible_methods_respect_validity_window(db, day, expected):
+    assert {m.id for m in fetch_visible_methods(db, "free", "en", day)} == expected
+
+
+def test_visible_methods_fall_back_to_english(db):
+    methods = {m.id: m for m in fetch_visible_methods(db, "free", "cs", "2026-03-01")}
+    assert methods["basic"].language_code == "cs"
+    assert not methods["basic"].is_fallback
+    assert methods["english_only"].language_code == "en"
+    assert methods["english_only"].is_fallback
+
+
+@pytest.mark.parametrize("tier, lang", [("free", "cs"), ("free", "en"), ("pro", "de")])
+def test_rpc_matches_snapshot_view(db, tier, lang):
+    snapshot = load_snapshot(db)
+    assert fetch_visible_methods(db, tier, lang, "2026-03-01") == snapshot.visible(tier, lang, "2026-03-01")
+
+
+def test_cold_catalog_fetches_each_fallback_view_once():
+    calls = []
+    release = threading.Event()
+
+    def loader(previous):
+        release.wait(5)
+        raise RuntimeError("catalog still loading")
+
+    def fallback(tier, lang, day):
+        calls.append((tier, lang, day))
+        return ()
+
+    catalog = MethodCatalog(loader, fallback=fallback)
+    try:
+        for kind in ("facets", "ranges", "search"):
+            catalog.view_index(kind, "free", "cs", tuple, day="2026-03-01")
+        catalog.visible_methods("free", "cs", day="2026-03-01")
+        catalog.view_index("facets", "free", "en", tuple, day="2026-03-01")
+    finally:
+        release.set()
+
+    assert calls == [("free", "cs", "2026-03-01"), ("free", "en", "2026-03-01")]
+
+
+def test_failed_cold_load_waits_before_retrying():
+    attempts = []
+    failed = threading.Event()
+
+    def loader(previous):
+        attempts.append(previous)
+        failed.set()
+        raise RuntimeError("database down")
+
+    catalog = MethodCatalog(loader, fallback=lambda tier, lang, day: ())
+    catalog.visible_methods("free", "en", day="2026-03-01")
+    assert failed.wait(5)
+    while catalog._refreshing:
+        time.sleep(0.01)
+
+    for _ in range(10):
+        catalog.visible_methods("free", "en", day="2026-03-01")
+    assert len(attempts) == 1
+
+
+def test_snapshot_drops_views_of_past_days(db):
+    snapshot = load_snapshot(db)
+    snapshot.visible("free", "en", "2026-03-01")
+    snapshot.derived(("facets", "free", "en", "2026-03-01"), lambda: "index")
+    snapshot.derived(("by_id", "en"), lambda: "lookup")
+
+    snapshot.visible("free", "en", "2026-03-02")
+
+    assert set(snapshot._views) == {("free", "en", "2026-03-02"), ("by_id", "en")}
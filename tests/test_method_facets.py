@@ -0,0 +1,27 @@
+from modules.method_facets import FacetIndex
+from utils.data import Method
+
+
+def method(i, tags):
+    return Method(id=f"m{i}", name=f"Method {i}", tags=tuple(tags))
+
+
+METHODS = [method(1, ["Skupinová práce"]), method(2, ["Diskuse"]), method(3, [])]
+
+
+def test_mask_filters_by_known_values():
+    facets = FacetIndex(METHODS)
+    assert [m.id for m in facets.select(facets.mask({"tags": ["Diskuse"]}))] == ["m2"]
+
+
+def test_unknown_values_are_ignored():
+    # "Group work" was picked in English; this view is Czech
+    facets = FacetIndex(METHODS)
+    assert len(facets.select(facets.mask({"tags": ["Group work"]}))) == 3
+    assert [m.id for m in facets.select(facets.mask({"tags": ["Group work", "Diskuse"]}))] == ["m2"]
+
+
+def test_known_prunes_stale_selections():
+    facets = FacetIndex(METHODS)
+    selected = {"tags": ["Group work", "Diskuse"], "materials": ["Timer"], "gone": ["x"]}
+    assert facets.known(selected) == {"tags": ["Diskuse"], "materials": []}
@@ -0,0 +1,29 @@
+import pytest
+
+from modules.method_ranges import parse_ages, parse_minutes
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("30–60 min", (30, 60)),
+    ("1,5 h", (90, 90)),
+    ("15+ min", (15, None)),
+    ("1-2 hod", (60, 120)),
+    ("30 min – 1 h", (30, 60)),
+    ("1 h 30 min", (90, 90)),
+    ("1 h 30", (90, 90)),
+    ("1 vyučovací hodina", (45, 45)),
+    ("2 vyučovací hodiny", (90, 90)),
+    ("1–2 vyuč. hod.", (45, 90)),
+    ("", (None, None)),
+    ("podle potřeby", (None, None)),
+])
+def test_parse_minutes(text, expected):
+    assert parse_minutes(text) == expected
+
+
+def test_parse_ages():
+    assert parse_ages(["10–12 let"]) == (10, 12)
+    assert parse_ages(["1. stupeň ZŠ", "SŠ"]) == (6, 19)
+    assert parse_ages(["1.–9. ročník"]) == (6, 15)
+    assert parse_ages(["3.–5. třída"]) == (8, 11)
+    assert parse_ages([]) == (None, None)
@@ -0,0 +1,35 @@
+import pytest
+
+from modules.methods_manipulation import MAX_PER_BLOCK, generate_lesson_plans
+
+ALLOCATIONS = {1: 50, 2: 50}
+
+
+def method(i, minutes, block):
+    # (id, name, description, minutes, age labels, block, ...)
+    return (f"m{i}", f"Method {i}", "", minutes, None, block, None, None, None, None)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_small_pool_plans_are_full_and_distinct(seed):
+    # 3 five-minute methods per block all fit: every plan must hold all 6 once
+    methods = [method(i, 5, 1 + i % 2) for i in range(2 * MAX_PER_BLOCK)]
+    plans = generate_lesson_plans(methods, 60, ALLOCATIONS, n_candidates=64, seed=seed)
+
+    assert plans
+    for plan in plans:
+        ids = [m[0] for m in plan["methods"]]
+        assert len(ids) == len(set(ids))
+        assert len(ids) == 2 * MAX_PER_BLOCK
+        assert plan["minutes"] == 30
+
+
+def test_large_pool_plans_have_no_duplicates():
+    methods = [method(i, 5 + i % 7, 1 + i % 2) for i in range(2000)]
+    plans = generate_lesson_plans(methods, 45, ALLOCATIONS, n_plans=5, seed=1)
+
+    assert len(plans) == 5
+    for plan in plans:
+        ids = [m[0] for m in plan["methods"]]
+        assert len(ids) == len(set(ids))
+        assert sum(m[3] for m in plan["methods"]) == plan["minutes"] <= 45
@@ -0,0 +1,46 @@
+import pytest
+
+from modules.topic_index import TopicIndex, group_key
+
+GROUP = group_key(["m1", "m2"], "en", 3)
+
+
+@pytest.fixture
+def index():
+    index = TopicIndex(maxsize=16)
+    for topic in ["Photosynthesis", "Volcanoes", "The Czech Republic", "World War II", "Addition of fractions"]:
+        index.add(GROUP, topic, f"key:{topic}")
+    return index
+
+
+@pytest.mark.parametrize("query, topic", [
+    ("photosynthesis", "Photosynthesis"),
+    ("fotosyntéza", "Photosynthesis"),
+    ("Volcano", "Volcanoes"),
+    ("Czech Republic", "The Czech Republic"),
+])
+def test_paraphrase_reuses(index, query, topic):
+    assert index.lookup(GROUP, query)[1] == topic
+
+
+@pytest.mark.parametrize("query", [
+    "Volcanoes of Iceland",
+    "Volcanoes in Italy",
+    "Czech Republic history",
+    "Czech Republic geography",
+    "Photosynthesis in plants",
+    "World War I",
+    "Subtraction of fractions",
+])
+def test_narrower_or_different_topic_misses(index, query):
+    assert index.lookup(GROUP, query) is None
+
+
+def test_groups_are_separate(index):
+    assert index.lookup(group_key(["m1"], "en", 3), "Volcanoes") is None
+
+
+def test_broader_topic_misses():
+    index = TopicIndex(maxsize=4)
+    index.add(GROUP, "Volcanoes of Iceland", "key:iceland")
+    assert index.lookup(GROUP, "Volcanoes") is None
@@ -2,30 +2,45 @@
 from dataclasses import dataclass
 from typing import List, Optional
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MethodStep:
     title: str
     description: str
     durationMin: Optional[int] = None
+    order: Optional[int] = None
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Method:
     id: str
     name: str
-    summary: str = ""
-    useFor: List[str] = None
+    description: str = ""          # `description` column
+    age_group: List[str] = None    # `age_group` column: "1. stupeň ZŠ", "SŠ", ...
     time: str = ""
     materials: List[str] = None
     steps: List[MethodStep] = None
     tips: List[str] = None
     videoUrl: Optional[str] = None
+    # catalog-only fields (see modules/method_catalog.py)
+    language_code: str = "en"
+    tags: List[str] = None
+    before: List[MethodStep] = None
+    after: List[MethodStep] = None
+    is_fallback: bool = False  # English row served for another requested language
+    step_text: str = ""  # flattened step titles/activities, for search
+    # parsed from `time` / `age_group` (see modules/method_ranges.py)
+    time_min: Optional[int] = None
+    time_max: Optional[int] = None
+    age_min: Optional[int] = None
+    age_max: Optional[int] = None
+    block: Optional[int] = None  # lesson block for the planner
+    updated_at: Optional[str] = None  # row stamp; tells detail-only edits apart
 
 methods: List[Method] = [
     Method(
         id="jigsaw",
         name="Jigsaw",
-        summary="Students master a sub-topic in expert groups, then re-form to teach one another.",
-        useFor=["Complex topics", "Peer teaching", "Accountability"],
+        description="Students master a sub-topic in expert groups, then re-form to teach one another.",
+        tags=["Complex topics", "Peer teaching", "Accountability"],
         time="30–60 min",
         materials=["Handouts", "Timer"],
         steps=[
@@ -40,8 +55,8 @@ methods: List[Method] = [
     Method(
         id="bus-stops",
         name="Bus Stops",
-        summary="Teams rotate through station prompts, adding ideas and building on prior notes.",
-        useFor=["Brainstorming", "Surfacing prior knowledge", "Idea elaboration"],
+        description="Teams rotate through station prompts, adding ideas and building on prior notes.",
+        tags=["Brainstorming", "Surfacing prior knowledge", "Idea elaboration"],
         time="20–40 min",
         materials=["Flipcharts", "Markers", "Tape"],
         steps=[
@@ -55,8 +70,8 @@ methods: List[Method] = [
     Method(
         id="line",
         name="Line (Human Continuum)",
-        summary="Students place themselves along agree↔disagree and justify; they may move as arguments persuade.",
-        useFor=["Argumentation", "Perspective taking", "Controversial issues"],
+        description="Students place themselves along agree↔disagree and justify; they may move as arguments persuade.",
+        tags=["Argumentation", "Perspective taking", "Controversial issues"],
         time="15–30 min",
         materials=["Open space", "Statement(s)"],
         steps=[